@@ -0,0 +1,20 @@
+-- Composite indexes for the API's "latest rows for X" lookups
+-- Each matches an equality/IN filter followed by ORDER BY timestamp DESC,
+-- so Postgres can read the newest rows straight from the index instead of sorting
+
+-- Per-city check for companies analyzed in previous batches
+-- (.in_("company", ...).order("timestamp", desc=True))
+CREATE INDEX IF NOT EXISTS idx_company_analysis_company_ts ON company_analysis(company, timestamp DESC);
+
+-- /companies/target (.eq("recommendation", "TARGET").order("timestamp", desc=True))
+CREATE INDEX IF NOT EXISTS idx_company_analysis_recommendation_ts ON company_analysis(recommendation, timestamp DESC);
+
+-- /batch/{batch_id} and /logs/{batch_id} log fetches
+CREATE INDEX IF NOT EXISTS idx_search_logs_enhanced_batch_ts ON search_logs_enhanced(batch_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_search_logs_batch_ts ON search_logs(batch_id, timestamp DESC);
+
+-- /batch/{batch_id} Hunter.io emails
+CREATE INDEX IF NOT EXISTS idx_hunter_emails_batch_ts ON hunter_emails(batch_id, timestamp DESC);
+
+-- agents(batch_id) is already indexed by fix_missing_columns.sql (idx_agents_batch_id),
+-- which covers the status updates and inc_agent() counter increments
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse, HTMLResponse, Response, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 from pydantic import BaseModel
@@ -17,19 +17,63 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import utility modules
-from utils.job_scraper import JobScraper
+from utils.job_scraper import JobScraper, US_CITIES
 from utils.contact_finder import ContactFinder
 from utils.email_generator import EmailGenerator
 from utils.memory_manager import MemoryManager
 from utils.contract_analyzer import ContractAnalyzer
 from utils.instantly_manager import InstantlyManager
 from utils.blacklist_manager import BlacklistManager
-from utils.supabase_tracker import CompanyProcessingTracker
-import requests  # Add missing import for company analysis API calls
+from utils.supabase_tracker import CompanyProcessingTracker, FLUSH_BATCH_SIZE
+from utils.ttl_cache import TTLCache
 import time  # Add time import for rate limiting
 import json
 import asyncio
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass, asdict
 import httpx
+import uuid
+import random
+import hashlib
+import re
+import csv
+import io
+
+# PyJWT setup (optional - falls back to simple token parsing without it)
+try:
+    import jwt
+except ImportError:
+    jwt = None
+
+# msgspec setup (optional - falls back to pydantic serialization without it)
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# orjson setup (optional - falls back to the standard json encoder without it)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode to JSON bytes, with orjson when it's installed (non-JSON values fall back to str)"""
+    if orjson:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(obj, default=str, sort_keys=sort_keys).encode()
+
+def json_loads(raw: Any) -> Any:
+    """Decode JSON bytes or text, with orjson when it's installed"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+# Redis setup (optional - rate limiting stays per-process without it)
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 # Supabase setup (optional - will work without it)
 try:
@@ -56,39 +100,231 @@ class RateLimiter:
     def __init__(self, max_requests=20, time_window=60):
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []
+        self.requests = deque(maxlen=max_requests)
     
     def can_make_request(self):
         """Check if we can make a request without hitting rate limit"""
         now = time.time()
         # Remove requests older than time_window
-        self.requests = [req_time for req_time in self.requests if now - req_time < self.time_window]
+        while self.requests and now - self.requests[0] >= self.time_window:
+            self.requests.popleft()
         return len(self.requests) < self.max_requests
     
     def record_request(self):
         """Record that a request was made"""
         self.requests.append(time.time())
+
+# Sliding-window log in a sorted set: trim, count, and record atomically.
+# Returns "0" when the request is admitted, otherwise seconds until a slot frees up.
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('EXPIRE', key, math.ceil(window))
+    return '0'
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return tostring(tonumber(oldest[2]) + window - now)
+"""
+
+# Redis calls fail fast, and after a failure Redis is skipped for a while so an
+# unreachable server doesn't add a connect attempt (and a warning) to every call
+REDIS_TIMEOUT = 0.5  # seconds
+REDIS_COOLDOWN = 30  # seconds
+_redis_retry_at = 0.0
+
+def redis_ok() -> bool:
+    """False while Redis is cooling down after a failed call"""
+    return time.time() >= _redis_retry_at
+
+def redis_failed(what: str, error: Exception):
+    """Skip Redis for REDIS_COOLDOWN seconds, logging once per outage"""
+    global _redis_retry_at
+    if redis_ok():
+        logger.warning(f"Redis {what} unavailable, retrying in {REDIS_COOLDOWN}s: {error}")
+    _redis_retry_at = time.time() + REDIS_COOLDOWN
+
+# X-RateLimit reset values above this are epoch timestamps, below it seconds until reset
+EPOCH_RESET_THRESHOLD = 1e9
+
+class AsyncRateLimiter(RateLimiter):
+    """Non-blocking rate limiter shared across Uvicorn workers via Redis.
+    
+    Falls back to the in-process sliding window when REDIS_URL is not set,
+    the redis package is missing, or Redis is unreachable.
+    """
     
-    def wait_if_needed(self):
-        """Wait if we're at the rate limit"""
-        if not self.can_make_request():
-            wait_time = self.time_window - (time.time() - self.requests[0])
-            if wait_time > 0:
-                logger.info(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-        self.record_request()
+    def __init__(self, name: str, max_requests=20, time_window=60, redis_client=None):
+        super().__init__(max_requests, time_window)
+        self.key = f"ratelimit:{name}"
+        self.lock = asyncio.Lock()
+        self.paused_until = 0.0
+        self.redis = redis_client
+        self.script = redis_client.register_script(SLIDING_WINDOW_LUA) if redis_client else None
+    
+    async def acquire(self):
+        """Wait (without blocking the event loop) until a request is allowed, then record it"""
+        while True:
+            pause = self.paused_until - time.time()
+            if pause > 0:
+                logger.info(f"Provider asked us to back off. Waiting {pause:.1f} seconds...")
+                await asyncio.sleep(pause)
+                continue
+            wait_time = await self._try_acquire()
+            if wait_time <= 0:
+                return
+            logger.info(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
+            await asyncio.sleep(wait_time)
+    
+    def update_from_headers(self, headers) -> float:
+        """Pause acquisitions per the response's Retry-After / X-RateLimit headers; returns the pause in seconds"""
+        delay = 0.0
+        retry_after = headers.get("retry-after")
+        remaining = headers.get("x-ratelimit-requests-remaining") or headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-requests-reset") or headers.get("x-ratelimit-reset")
+        try:
+            if retry_after:
+                delay = float(retry_after)
+            elif remaining is not None and int(remaining) <= 0 and reset:
+                delay = float(reset)
+                # Some providers send the reset as an epoch timestamp rather than seconds;
+                # anything past 1e9 (2001) can't be a countdown, even for monthly quotas
+                if delay > EPOCH_RESET_THRESHOLD:
+                    delay -= time.time()
+        except ValueError:
+            return 0.0
+        if delay > 0:
+            self.paused_until = max(self.paused_until, time.time() + delay)
+            return delay
+        return 0.0
+    
+    async def _try_acquire(self) -> float:
+        if self.redis and redis_ok():
+            try:
+                now = time.time()
+                result = await self.script(
+                    keys=[self.key],
+                    args=[now, self.time_window, self.max_requests, uuid.uuid4().hex]
+                )
+                return float(result)
+            except Exception as e:
+                redis_failed("rate limiter", e)
+        
+        async with self.lock:
+            if self.can_make_request():
+                self.record_request()
+                return 0
+            return self.time_window - (time.time() - self.requests[0])
 
-# Initialize rate limiter
-rate_limiter = RateLimiter(max_requests=20, time_window=60)
+# Shared Redis connection for cross-worker rate limiting and caches (None without REDIS_URL)
+redis_client = aioredis.from_url(
+    os.getenv("REDIS_URL"),
+    socket_connect_timeout=REDIS_TIMEOUT,
+    socket_timeout=REDIS_TIMEOUT
+) if os.getenv("REDIS_URL") and aioredis else None
 
-# Global search cancellation tracking
-active_searches = {}  # batch_id -> cancellation flag
+# Initialize rate limiter
+rate_limiter = AsyncRateLimiter("rapidapi", max_requests=20, time_window=60, redis_client=redis_client)
+# Clearout and Hunter.io are throttled only when a cache miss actually calls them
+clearout_rate_limiter = AsyncRateLimiter("clearout", max_requests=10, time_window=1, redis_client=redis_client)
+hunter_rate_limiter = AsyncRateLimiter("hunter", max_requests=5, time_window=1, redis_client=redis_client)
+
+# Concurrency for async RapidAPI fan-out (429s are retried with jittered backoff)
+RAPIDAPI_CONCURRENCY = int(os.getenv("RAPIDAPI_CONCURRENCY", "16"))
+RAPIDAPI_MAX_RETRIES = 3
+
+# Concurrent Instantly.ai API calls when fanning out per campaign
+INSTANTLY_CONCURRENCY = 16
+
+# Supabase Edge Function that pushes leads into Instantly.ai
+EDGE_FUNCTION_URL = f"{os.getenv('SUPABASE_URL', '')}/functions/v1/send-to-instantly"
+SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+EDGE_FUNCTION_HEADERS = {
+    "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+    "Content-Type": "application/json"
+}
+
+# Concurrent JobSpy city searches per request
+JOBSPY_CONCURRENCY = 4
+
+# Companies processed concurrently within a city in /search-jobs
+COMPANY_CONCURRENCY = 8
+
+# Worker threads for the synchronous SDK/HTTP clients. Slow OpenAI calls get their own
+# small pool so they can't occupy the threads RapidAPI, Hunter.io and Supabase calls need.
+API_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix="api")
+LLM_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+
+async def run_in_pool(pool: ThreadPoolExecutor, func, *args, **kwargs):
+    """Run a blocking call on the given worker pool without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(pool, partial(func, *args, **kwargs))
+
+def normalize_company(company: str) -> str:
+    """Dedupe key for a company name, matching the blacklist's normalization"""
+    return company.strip().lower()
+
+def first_job_per_company(jobs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """First job listed for each distinct company, keyed by normalize_company()"""
+    by_company = {}
+    for job in jobs:
+        by_company.setdefault(normalize_company(job.get('company', '')), job)
+    return by_company
+
+# Large enterprises skipped by the background agent, matched anywhere in the company name
+ENTERPRISE_COMPANIES = frozenset({"google", "microsoft", "amazon", "apple"})
+_ENTERPRISE_RE = re.compile("|".join(sorted(map(re.escape, ENTERPRISE_COMPANIES))))
+
+def is_enterprise_company(company: str) -> bool:
+    """True if the company name contains one of ENTERPRISE_COMPANIES"""
+    return bool(company) and _ENTERPRISE_RE.search(company.lower()) is not None
+
+_MISSING = object()
+
+# Global search cancellation tracking: batch_ids still running, and those asked to stop
+running_searches: set = set()
+cancelled_searches: set = set()
+# Set on cancellation so a running background task can abort in-flight city work at once
+cancel_events: Dict[str, asyncio.Event] = {}
+
+def request_cancel(batch_id: str) -> bool:
+    """Mark a running search as cancelled and wake its background task"""
+    if batch_id not in running_searches:
+        return False
+    running_searches.discard(batch_id)
+    cancelled_searches.add(batch_id)
+    event = cancel_events.get(batch_id)
+    if event:
+        event.set()
+    return True
+
+def finish_search(batch_id: str):
+    """Forget a search's in-memory state once its background task ends"""
+    running_searches.discard(batch_id)
+    cancelled_searches.discard(batch_id)
+    cancel_events.pop(batch_id, None)
+
+# Decoded auth tokens: token -> (expires_at, user)
+_jwt_cache: Dict[str, tuple] = {}
+_JWT_TTL = 60
+_JWT_CACHE_MAX = 4096
+
+def _cache_user(token: str, user: Dict[str, str]) -> Dict[str, str]:
+    """Remember the user resolved for a token for _JWT_TTL seconds"""
+    now = time.time()
+    if len(_jwt_cache) > _JWT_CACHE_MAX:
+        for key in [k for k, (expires_at, _) in _jwt_cache.items() if expires_at <= now]:
+            del _jwt_cache[key]
+    _jwt_cache[token] = (now + _JWT_TTL, user)
+    return user
 
 # User authentication
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    """Get current user from authorization header"""
+def resolve_user(authorization: Optional[str]) -> Dict[str, str]:
+    """Resolve the current user from an authorization header"""
     if not authorization:
-        logger.warning("No authorization header provided")
         return {"user_id": "default_user", "email": "default@example.com"}
     
     try:
@@ -96,11 +332,17 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         # For now, extract user info from header if present
         if authorization.startswith("Bearer "):
             token = authorization.replace("Bearer ", "")
+            
+            entry = _jwt_cache.get(token)
+            if entry and entry[0] > time.time():
+                return entry[1]
+            
             logger.info(f"Processing Bearer token: {token[:20]}...")
             
             # Try to decode JWT token (Supabase Auth)
             try:
-                import jwt
+                if jwt is None:
+                    raise ImportError("PyJWT not installed")
                 # Decode without verification for now (in production, verify with Supabase public key)
                 decoded = jwt.decode(token, options={"verify_signature": False})
                 logger.info(f"JWT decoded successfully: {decoded}")
@@ -109,7 +351,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
                 email = decoded.get("email", "unknown@example.com")
                 
                 logger.info(f"Extracted user_id: {user_id}, email: {email}")
-                return {"user_id": user_id, "email": email}
+                return _cache_user(token, {"user_id": user_id, "email": email})
                 
             except Exception as jwt_error:
                 logger.warning(f"JWT decode failed: {jwt_error}")
@@ -121,10 +363,10 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
                     # Assume token contains user info in format "user_id:email"
                     parts = token.split(":")
                     if len(parts) == 2:
-                        return {"user_id": parts[0], "email": parts[1]}
+                        return _cache_user(token, {"user_id": parts[0], "email": parts[1]})
                     else:
                         # If token doesn't match expected format, use it as user_id
-                        return {"user_id": token, "email": f"{token}@example.com"}
+                        return _cache_user(token, {"user_id": token, "email": f"{token}@example.com"})
         else:
             logger.warning(f"Authorization header doesn't start with 'Bearer ': {authorization[:20]}...")
         
@@ -133,62 +375,498 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         logger.error(f"Error parsing authorization header: {e}")
         return {"user_id": "default_user", "email": "default@example.com"}
 
-# Real-time logging to Supabase
+async def get_current_user(request: Request) -> Dict[str, str]:
+    """Get the current user resolved by the auth middleware"""
+    return request.state.user
+
+# Formatted timestamp cache, refreshed at most every 10ms: [monotonic seconds, isoformat string]
+_TS_CACHE = [float("-inf"), ""]
+
+def _now_iso() -> str:
+    """Current local time in ISO format, reformatted at most every 10ms"""
+    t = time.monotonic()
+    if t - _TS_CACHE[0] > 0.01:
+        _TS_CACHE[0] = t
+        _TS_CACHE[1] = datetime.now().isoformat()
+    return _TS_CACHE[1]
+
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
+# Frames a streaming response may buffer ahead of a slow client
+STREAM_QUEUE_SIZE = 1024
+
+# Rows per chunk of a streamed CSV export (each chunk is one threadpool hop)
+CSV_CHUNK_ROWS = 500
+
+def sse_event(event_type: str, **fields) -> bytes:
+    """Encode one server-sent event frame for the streaming endpoints"""
+    event = {"type": event_type, **fields, "timestamp": _now_iso()}
+    return SSE_PREFIX + json_dumps(event) + SSE_SUFFIX
+
+# Real-time logging to Supabase - rows are queued and written in bulk by log_flusher()
+log_queue: asyncio.Queue = asyncio.Queue()
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.25  # seconds
+# Log table for reads and writes: probed once at startup, and switched to the basic
+# table after the first failed enhanced insert so it isn't retried per batch
+_LOG_TABLE = "search_logs_enhanced"
+
 async def log_to_supabase(batch_id: str, message: str, level: str = "info", company: str = None, 
                           job_title: str = None, job_url: str = None, processing_stage: str = None):
-    """Send log message directly to Supabase in real-time"""
+    """Queue a log message for the next bulk insert to Supabase"""
     if not supabase:
         return
     
+    log_queue.put_nowait({
+        "batch_id": batch_id,
+        "message": message,
+        "level": level,
+        "company": company,
+        "job_title": job_title,
+        "job_url": job_url,
+        "processing_stage": processing_stage,
+        "timestamp": _now_iso()
+    })
+
+if supabase is None:
+    async def log_to_supabase(*args, **kwargs):
+        """Supabase not configured - logging to Supabase is a no-op"""
+        return
+
+def write_log_rows(rows: List[Dict[str, Any]]):
+    """Bulk insert queued log rows, falling back to the basic logs table"""
+    global _LOG_TABLE
     try:
-        log_data = {
-            "batch_id": batch_id,
-            "message": message,
-            "level": level,
-            "company": company,
-            "job_title": job_title,
-            "job_url": job_url,
-            "processing_stage": processing_stage,
-            "timestamp": datetime.now().isoformat()
-        }
-        
         # Try enhanced table first, fallback to old table
-        try:
-            supabase.table("search_logs_enhanced").insert(log_data).execute()
-        except Exception:
-            # Fallback to old table
-            basic_log_data = {
-                "batch_id": batch_id,
-                "message": message,
-                "level": level,
-                "company": company,
-                "timestamp": datetime.now().isoformat()
+        if _LOG_TABLE == "search_logs_enhanced":
+            try:
+                supabase.table("search_logs_enhanced").insert(rows, returning="minimal").execute()
+                return
+            except Exception:
+                logger.warning("⚠️ search_logs_enhanced insert failed, using search_logs from now on")
+                _LOG_TABLE = "search_logs"
+        
+        basic_rows = [
+            {
+                "batch_id": row["batch_id"],
+                "message": row["message"],
+                "level": row["level"],
+                "company": row["company"],
+                "timestamp": row["timestamp"]
             }
-            supabase.table("search_logs").insert(basic_log_data).execute()
-        
+            for row in rows
+        ]
+        supabase.table("search_logs").insert(basic_rows, returning="minimal").execute()
+    
     except Exception as e:
         # Fallback to console logging if Supabase fails
-        logger.error(f"Failed to log to Supabase: {e}")
-        logger.info(f"[{batch_id}] {message}")
+        logger.error(f"Failed to log {len(rows)} messages to Supabase: {e}")
+        for row in rows:
+            logger.info(f"[{row['batch_id']}] {row['message']}")
+
+async def log_flusher():
+    """Drain log_queue in batches of up to LOG_BATCH_SIZE rows or LOG_FLUSH_INTERVAL seconds"""
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await log_queue.get()]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        while len(rows) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(await asyncio.wait_for(log_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                # Shutting down - hand the partial batch back for the final drain
+                for row in rows:
+                    log_queue.put_nowait(row)
+                raise
+        await run_in_pool(API_POOL, write_log_rows, rows)
+
+async def flush_logs():
+    """Write everything currently in log_queue without waiting for the flusher"""
+    rows = []
+    while not log_queue.empty():
+        rows.append(log_queue.get_nowait())
+    for start in range(0, len(rows), LOG_BATCH_SIZE):
+        await run_in_pool(API_POOL, write_log_rows, rows[start:start + LOG_BATCH_SIZE])
 
 app = FastAPI(
     title="MCP: Master Control Program API",
     description="Automated recruiting and outreach platform API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if orjson else JSONResponse
 )
 
+# Shared HTTP client so outbound calls reuse pooled keep-alive connections
+http_client = httpx.AsyncClient(
+    http2=True,
+    # Fail fast on unreachable hosts; slow responses still get the full 30s
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled outbound connections on shutdown"""
+    await http_client.aclose()
+
+@app.on_event("startup")
+async def check_edge_function_config():
+    """Warn once at startup if Instantly.ai leads can't be sent"""
+    if not SERVICE_ROLE_KEY:
+        logger.warning("⚠️ SUPABASE_SERVICE_ROLE_KEY not set - Edge Function calls to Instantly.ai will be skipped")
+
+@app.on_event("startup")
+async def probe_log_table():
+    """Fall back to the basic logs table up front if search_logs_enhanced doesn't exist"""
+    global _LOG_TABLE
+    if not supabase:
+        return
+    try:
+        await run_in_pool(API_POOL, supabase.table("search_logs_enhanced").select("batch_id").limit(1).execute)
+    except Exception as e:
+        logger.warning(f"⚠️ search_logs_enhanced unavailable, using search_logs: {e}")
+        _LOG_TABLE = "search_logs"
+
+@app.on_event("startup")
+async def start_log_flusher():
+    """Start the background task that bulk-writes queued Supabase logs"""
+    if supabase:
+        app.state.log_flusher = asyncio.create_task(log_flusher())
+
+@app.on_event("shutdown")
+async def stop_log_flusher():
+    """Stop the log flusher and write any logs still queued"""
+    flusher = getattr(app.state, "log_flusher", None)
+    if flusher:
+        flusher.cancel()
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            pass
+    await flush_logs()
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    """Release the worker pools once the other shutdown hooks have used them"""
+    API_POOL.shutdown(wait=False)
+    LLM_POOL.shutdown(wait=False)
+
+@app.middleware("http")
+async def attach_user(request: Request, call_next):
+    """Resolve the caller once per request so endpoints just read request.state.user"""
+    request.state.user = resolve_user(request.headers.get("authorization"))
+    return await call_next(request)
+
+# Clearout company domain lookups keyed by normalized company name; also kept
+# in Redis so the same companies across cities, workers and restarts hit Clearout once
+DOMAIN_CACHE_TTL = 7 * 24 * 3600
+DOMAIN_CACHE_MISS_TTL = 3600  # seconds - retry companies with no domain sooner
+_DOMAIN_CACHE = TTLCache(ttl=DOMAIN_CACHE_TTL, maxsize=10000)
+
+# Hunter.io emails keyed by (normalized company, normalized website); also kept
+# in Redis for a week so paid lookups are shared across workers and restarts
+HUNTER_CACHE_MISS_TTL = 600  # seconds - empty results may be transient API errors
+HUNTER_REDIS_TTL = 7 * 24 * 3600
+_HUNTER_CACHE = TTLCache(ttl=3600, maxsize=5000)
+
+# RapidAPI people lookups keyed by normalized company name
+_PEOPLE_CACHE = TTLCache(ttl=3600, maxsize=5000)
+
+# JobSpy results keyed by a digest of the search arguments; identical searches
+# in flight at the same time share one call, and results are kept in Redis so
+# back-to-back batches on other workers skip the scrape too
+JOB_SEARCH_CACHE_TTL = 15 * 60
+_JOB_SEARCH_CACHE = TTLCache(ttl=JOB_SEARCH_CACHE_TTL, maxsize=512)
+_JOB_SEARCH_INFLIGHT: Dict[bytes, asyncio.Task] = {}
+
+# Dashboard stats/overview responses keyed by endpoint; polling clients share one
+# upstream call per TTL, and concurrent misses share one call
+DASHBOARD_CACHE_TTL = 10  # seconds
+_DASHBOARD_CACHE = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=16)
+_DASHBOARD_INFLIGHT: Dict[str, asyncio.Task] = {}
+
+# Outreach messages generated in the background, polled via /lead/{lead_id}/message;
+# also kept in Redis so any worker can answer the poll
+LEAD_MESSAGE_TTL = 24 * 3600
+_LEAD_MESSAGES = TTLCache(ttl=LEAD_MESSAGE_TTL, maxsize=10000)
+_MESSAGE_TASKS: set = set()
+
+# find_contacts summaries (TA team, contacts) keyed by normalize_company(), shared by
+# the stream and /create-instantly-campaign; concurrent misses share one lookup
+_COMPANY_ANALYSIS_CACHE = TTLCache(ttl=24 * 3600, maxsize=50000)
+_COMPANY_ANALYSIS_INFLIGHT: Dict[str, asyncio.Task] = {}
+
+async def resolve_domain(company: str) -> Optional[str]:
+    """Find a company's domain via the Clearout autocomplete API, memoized per company"""
+    key = normalize_company(company)
+    cached = _DOMAIN_CACHE.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    
+    redis_key = "domain:" + key
+    if redis_client and redis_ok():
+        try:
+            raw = await redis_client.get(redis_key)
+            if raw is not None:
+                domain = json_loads(raw)
+                _DOMAIN_CACHE.set(key, domain, None if domain else DOMAIN_CACHE_MISS_TTL)
+                return domain
+        except Exception as e:
+            redis_failed("domain cache", e)
+    
+    domain = None
+    try:
+        url = "https://api.clearout.io/public/companies/autocomplete"
+        params = {"query": company}
+        
+        logger.info("🌐 Making domain finding call for %s", company)
+        await clearout_rate_limiter.acquire()
+        response = await http_client.get(url, params=params)
+        clearout_rate_limiter.update_from_headers(response.headers)
+        
+        if response.status_code == 200:
+            data = json_loads(response.content)
+            if data.get('status') == 'success' and data.get('data'):
+                # Get the best match with highest confidence
+                best_confidence = 0
+                for company_data in data['data']:
+                    confidence = company_data.get('confidence_score', 0)
+                    if confidence > best_confidence and confidence >= 50:
+                        best_confidence = confidence
+                        domain = company_data.get('domain')
+                
+                if not domain:
+                    logger.warning("⚠️  No high-confidence domain found for %s (best confidence: %s)", company, best_confidence)
+            else:
+                logger.warning("⚠️  Clearout API failed for %s: %s", company, data.get('message', 'Unknown error'))
+        else:
+            # Don't cache transient API errors
+            logger.warning("⚠️  Clearout API error for %s: %s", company, response.status_code)
+            return None
+    except Exception as e:
+        logger.error("❌ Domain finding failed for %s: %s", company, e)
+        return None
+    
+    _DOMAIN_CACHE.set(key, domain, None if domain else DOMAIN_CACHE_MISS_TTL)
+    if redis_client and redis_ok():
+        try:
+            await redis_client.set(redis_key, json_dumps(domain), ex=DOMAIN_CACHE_TTL if domain else DOMAIN_CACHE_MISS_TTL)
+        except Exception as e:
+            redis_failed("domain cache", e)
+    return domain
+
+async def find_hunter_emails(company: str, job_title: str, employee_roles: List[str],
+                             company_website: Optional[str]) -> List[Dict[str, Any]]:
+    """Hunter.io emails for a target company, memoized per (company, website)"""
+    key = (company.strip().lower(), (company_website or "").strip().lower())
+    cached = _HUNTER_CACHE.get(key)
+    if cached is not None:
+        return list(cached)
+    
+    redis_key = "hunter:" + hashlib.sha1("|".join(key).encode()).hexdigest()
+    if redis_client and redis_ok():
+        try:
+            raw = await redis_client.get(redis_key)
+            if raw is not None:
+                emails = json_loads(raw)
+                _HUNTER_CACHE.set(key, emails, None if emails else HUNTER_CACHE_MISS_TTL)
+                return list(emails)
+        except Exception as e:
+            redis_failed("Hunter.io cache", e)
+    
+    await hunter_rate_limiter.acquire()
+    emails = await run_in_pool(
+        API_POOL,
+        contact_finder.find_hunter_emails_for_target_company,
+        company=company,
+        job_title=job_title,
+        employee_roles=employee_roles,
+        company_website=company_website
+    )
+    _HUNTER_CACHE.set(key, emails, None if emails else HUNTER_CACHE_MISS_TTL)
+    if redis_client and redis_ok():
+        try:
+            await redis_client.set(redis_key, json_dumps(emails), ex=HUNTER_REDIS_TTL if emails else HUNTER_CACHE_MISS_TTL)
+        except Exception as e:
+            redis_failed("Hunter.io cache", e)
+    return list(emails)
+
+async def analyze_company_contacts(company: str, role_hint: str, keywords: List[str],
+                                   company_website: Optional[str]) -> Dict[str, Any]:
+    """find_contacts summary for a company (TA team, contacts, roles), memoized for a day"""
+    key = normalize_company(company)
+    cached = _COMPANY_ANALYSIS_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    task = _COMPANY_ANALYSIS_INFLIGHT.get(key)
+    if task is None:
+        async def lookup() -> Dict[str, Any]:
+            await rate_limiter.acquire()
+            contacts, has_ta_team, employee_roles, company_found = await run_in_pool(
+                API_POOL,
+                contact_finder.find_contacts,
+                company=company,
+                role_hint=role_hint,
+                keywords=keywords,
+                company_website=company_website
+            )
+            analysis = {
+                'has_ta_team': has_ta_team,
+                'company_found': company_found,
+                'contacts': contacts,
+                'employee_roles': employee_roles
+            }
+            _COMPANY_ANALYSIS_CACHE.set(key, analysis)
+            return analysis
+        
+        task = asyncio.create_task(lookup())
+        _COMPANY_ANALYSIS_INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _COMPANY_ANALYSIS_INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+async def cached_job_search(search_fn, **kwargs) -> List[Dict[str, Any]]:
+    """Run a JobScraper search in a worker thread, memoized for 15 minutes per argument set"""
+    raw_key = json_dumps([search_fn.__name__, kwargs], sort_keys=True)
+    key = hashlib.blake2b(raw_key, digest_size=16).digest()
+    cached = _JOB_SEARCH_CACHE.get(key)
+    if cached is not None:
+        # Callers annotate jobs in place (e.g. company_website), so each gets its own dicts
+        return [dict(job) for job in cached]
+    
+    task = _JOB_SEARCH_INFLIGHT.get(key)
+    if task is None:
+        async def search() -> List[Dict[str, Any]]:
+            redis_key = "jobspy:" + key.hex()
+            if redis_client and redis_ok():
+                try:
+                    raw = await redis_client.get(redis_key)
+                    if raw is not None:
+                        return json_loads(raw)
+                except Exception as e:
+                    redis_failed("JobSpy cache", e)
+            jobs = await run_in_pool(API_POOL, search_fn, **kwargs)
+            if jobs and redis_client and redis_ok():
+                try:
+                    await redis_client.set(redis_key, json_dumps(jobs), ex=JOB_SEARCH_CACHE_TTL)
+                except Exception as e:
+                    redis_failed("JobSpy cache", e)
+            return jobs
+        
+        task = asyncio.create_task(search())
+        _JOB_SEARCH_INFLIGHT[key] = task
+        
+        def finish(done: asyncio.Task):
+            _JOB_SEARCH_INFLIGHT.pop(key, None)
+            # Empty results may be a transient JobSpy failure, so only cache hits
+            if not done.cancelled() and done.exception() is None and done.result():
+                _JOB_SEARCH_CACHE.set(key, done.result())
+        
+        task.add_done_callback(finish)
+    # Shielded so one cancelled caller doesn't cancel the search for the others
+    return [dict(job) for job in await asyncio.shield(task)]
+
+async def flush_tracker(tracker: CompanyProcessingTracker):
+    """Write a tracker's staged rows on API_POOL; rows are detached here so staging can continue meanwhile"""
+    staged = tracker.take_staged()
+    if staged:
+        await run_in_pool(API_POOL, tracker.write_staged, staged)
+
+async def flush_tracker_if_full(tracker: CompanyProcessingTracker):
+    """Flush early once a full insert's worth of rows is staged"""
+    if tracker.pending_rows >= FLUSH_BATCH_SIZE:
+        await flush_tracker(tracker)
+
+async def cached_dashboard_call(name: str, func) -> Any:
+    """Run a blocking dashboard query on API_POOL, memoized for DASHBOARD_CACHE_TTL seconds"""
+    cached = _DASHBOARD_CACHE.get(name, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    
+    task = _DASHBOARD_INFLIGHT.get(name)
+    if task is None:
+        task = asyncio.create_task(run_in_pool(API_POOL, func))
+        _DASHBOARD_INFLIGHT[name] = task
+        
+        def finish(done: asyncio.Task):
+            _DASHBOARD_INFLIGHT.pop(name, None)
+            if not done.cancelled() and done.exception() is None:
+                _DASHBOARD_CACHE.set(name, done.result())
+        
+        task.add_done_callback(finish)
+    return await asyncio.shield(task)
+
+# Read-only analytics responses may be reused by browsers/CDNs briefly, then revalidated by ETag
+ANALYTICS_CACHE_CONTROL = "public, max-age=10, stale-while-revalidate=30"
+
+def cacheable_json(request: Request, data: Any) -> Response:
+    """JSON response with Cache-Control and a content ETag; 304 if the client already has this payload"""
+    body = json_dumps(data)
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    headers = {"Cache-Control": ANALYTICS_CACHE_CONTROL, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Log fields the log endpoints return (present in both search_logs_enhanced and search_logs)
+LOG_COLUMNS = "batch_id,timestamp,level,message,company"
+
+# PostgREST returns at most this many rows per request, whatever range is asked for
+SUPABASE_MAX_ROWS = 1000
+
+# Largest /logs page, and how many of its ranges are fetched at once, so one
+# request can't take over the API_POOL threads provider calls need
+LOGS_MAX_LIMIT = 10000
+PAGE_CONCURRENCY = 4
+
+async def fetch_rows_paged(build_query, offset: int, limit: int) -> List[Dict[str, Any]]:
+    """Rows offset..offset+limit-1 of build_query(), fetched as concurrent SUPABASE_MAX_ROWS-row ranges"""
+    page_semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+    
+    async def fetch_page(start: int):
+        async with page_semaphore:
+            return await run_in_pool(API_POOL, build_query().range(start, min(start + SUPABASE_MAX_ROWS, offset + limit) - 1).execute)
+    
+    pages = await asyncio.gather(*(fetch_page(start) for start in range(offset, offset + limit, SUPABASE_MAX_ROWS)))
+    return [row for page in pages for row in page.data]
+
+async def find_contact_emails(contacts: List[Dict[str, Any]], company: str) -> List[tuple]:
+    """(contact, email) pairs for a company's contacts from one bulk lookup, in contact order"""
+    emails = await run_in_pool(
+        API_POOL,
+        contact_finder.find_emails_bulk, company, [contact.get('title', '') for contact in contacts]
+    )
+    return [(contact, emails.get(contact.get('title', ''))) for contact in contacts]
+
 # Serve static files (CSS, JS, images)
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Template file -> HTMLResponse, read from disk once (set DEV to re-read on every request)
+_TEMPLATE_CACHE: Dict[str, HTMLResponse] = {}
+
+def _render_template(path: str, not_found_html: str) -> HTMLResponse:
+    """Serve a template page from memory, falling back to a 404 page if the file is missing"""
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached and not os.getenv("DEV"):
+        return cached
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            response = HTMLResponse(content=f.read())
+    except FileNotFoundError:
+        return HTMLResponse(content=not_found_html, status_code=404)
+    _TEMPLATE_CACHE[path] = response
+    return response
+
 @app.get("/login", response_class=HTMLResponse)
 async def get_login():
     """Serve the login page"""
-    try:
-        with open("templates/login.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+    return _render_template("templates/login.html", """
         <html>
         <head><title>Coogi Login</title></head>
         <body>
@@ -196,16 +874,12 @@ async def get_login():
             <p>The login template file is missing. Please ensure templates/login.html exists.</p>
         </body>
         </html>
-        """, status_code=404)
+        """)
 
 @app.get("/signup", response_class=HTMLResponse)
 async def get_signup():
     """Serve the signup page"""
-    try:
-        with open("templates/signup.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+    return _render_template("templates/signup.html", """
         <html>
         <head><title>Coogi Signup</title></head>
         <body>
@@ -213,16 +887,12 @@ async def get_signup():
             <p>The signup template file is missing. Please ensure templates/signup.html exists.</p>
         </body>
         </html>
-        """, status_code=404)
+        """)
 
 @app.get("/ui", response_class=HTMLResponse)
 async def get_ui():
     """Serve the web UI"""
-    try:
-        with open("templates/index.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+    return _render_template("templates/index.html", """
         <html>
         <head><title>Coogi UI</title></head>
         <body>
@@ -230,16 +900,12 @@ async def get_ui():
             <p>The UI template file is missing. Please ensure templates/index.html exists.</p>
         </body>
         </html>
-        """, status_code=404)
+        """)
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def get_dashboard():
     """Serve the new dashboard UI"""
-    try:
-        with open("templates/dashboard.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+    return _render_template("templates/dashboard.html", """
         <html>
         <head><title>Coogi Dashboard</title></head>
         <body>
@@ -247,16 +913,12 @@ async def get_dashboard():
             <p>The dashboard template file is missing. Please ensure templates/dashboard.html exists.</p>
         </body>
         </html>
-        """, status_code=404)
+        """)
 
 @app.get("/agent-detail", response_class=HTMLResponse)
 async def get_agent_detail():
     """Serve the agent detail page"""
-    try:
-        with open("templates/agent_detail.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+    return _render_template("templates/agent_detail.html", """
         <html>
         <head><title>Agent Detail - Coogi</title></head>
         <body>
@@ -264,7 +926,7 @@ async def get_agent_detail():
             <p>The agent detail template file is missing. Please ensure templates/agent_detail.html exists.</p>
         </body>
         </html>
-        """, status_code=404)
+        """)
 
 # Initialize services
 job_scraper = JobScraper()
@@ -286,6 +948,7 @@ class JobSearchRequest(BaseModel):
     campaign_name: Optional[str] = None  # Optional: custom campaign name
     min_score: float = 0.5  # Minimum lead score for campaign inclusion
     custom_tags: Optional[List[str]] = None  # Optional: custom tags to add to leads
+    cities: Optional[List[str]] = None  # Optional: cities for the background agent (defaults to US_CITIES)
 
 class Lead(BaseModel):
     name: str
@@ -307,6 +970,33 @@ class JobSearchResponse(BaseModel):
     campaigns_created: Optional[List[str]] = None  # List of campaign IDs created
     leads_added: int = 0  # Total leads added to campaigns
 
+@dataclass(slots=True)
+class CompanyAnalysis:
+    """One analyzed company in /search-jobs, serialized into JobSearchResponse.companies_analyzed"""
+    company: str
+    job_title: str
+    job_url: str
+    has_ta_team: bool
+    contacts_found: int
+    top_contacts: List[Dict[str, Any]]
+    hunter_emails: List[Dict[str, Any]]
+    employee_roles: List[str]
+    company_website: Optional[str]
+    company_found: bool
+    recommendation: str
+    timestamp: str
+
+if msgspec:
+    # Schema-pinned mirror of JobSearchResponse for fast encoding on /search-jobs
+    class JobSearchResponseStruct(msgspec.Struct):
+        companies_analyzed: List[CompanyAnalysis]
+        jobs_found: int
+        total_processed: int
+        search_query: str
+        timestamp: str
+        campaigns_created: Optional[List[str]] = None
+        leads_added: int = 0
+
 class RawJobSpyResponse(BaseModel):
     jobs: List[Dict[str, Any]]
     total_jobs: int
@@ -427,22 +1117,39 @@ class WebhookRequest(BaseModel):
     summary: Dict[str, Any]
     timestamp: str
 
+# Environment snapshot - env vars don't change while the process is running
+_ENV_SNAPSHOT = {
+    "OPENAI_API_KEY": "SET" if os.getenv("OPENAI_API_KEY") else "NOT SET",
+    "HUNTER_API_KEY": "SET" if os.getenv("HUNTER_API_KEY") else "NOT SET",
+    "INSTANTLY_API_KEY": "SET" if os.getenv("INSTANTLY_API_KEY") else "NOT SET",
+    "RAPIDAPI_KEY": "SET" if os.getenv("RAPIDAPI_KEY") else "NOT SET",
+    "CLEAROUT_API_KEY": "SET" if os.getenv("CLEAROUT_API_KEY") else "NOT SET",
+    "SUPABASE_URL": os.getenv("SUPABASE_URL"),
+    "SUPABASE_ANON_KEY": "SET" if os.getenv("SUPABASE_ANON_KEY") else "NOT SET",
+    "SUPABASE_SERVICE_ROLE_KEY": "SET" if os.getenv("SUPABASE_SERVICE_ROLE_KEY") else "NOT SET",
+    "current_supabase_key_type": "service_role" if os.getenv("SUPABASE_SERVICE_ROLE_KEY") else "anonymous"
+}
+_SUPABASE_ENV_VARS = {k: v for k, v in os.environ.items() if "SUPABASE" in k}
+
+_API_STATUS = {
+    "OpenAI": bool(os.getenv("OPENAI_API_KEY")),
+    "RapidAPI": bool(os.getenv("RAPIDAPI_KEY")),
+    "Hunter.io": bool(os.getenv("HUNTER_API_KEY")),
+    "Instantly.ai": bool(os.getenv("INSTANTLY_API_KEY")),
+    "JobSpy_API": True  # Using external API
+}
+
+# Only email discovery is in demo mode without Hunter.io
+_DEMO_MODE = not bool(os.getenv("HUNTER_API_KEY"))
+
 # API Endpoints
 @app.get("/debug/env")
 async def debug_environment():
     """Debug endpoint to check environment variables"""
     return {
-        "OPENAI_API_KEY": "SET" if os.getenv("OPENAI_API_KEY") else "NOT SET",
-        "HUNTER_API_KEY": "SET" if os.getenv("HUNTER_API_KEY") else "NOT SET", 
-        "INSTANTLY_API_KEY": "SET" if os.getenv("INSTANTLY_API_KEY") else "NOT SET",
-        "RAPIDAPI_KEY": "SET" if os.getenv("RAPIDAPI_KEY") else "NOT SET",
-        "CLEAROUT_API_KEY": "SET" if os.getenv("CLEAROUT_API_KEY") else "NOT SET",
-        "SUPABASE_URL": os.getenv("SUPABASE_URL"),
-        "SUPABASE_ANON_KEY": "SET" if os.getenv("SUPABASE_ANON_KEY") else "NOT SET",
-        "SUPABASE_SERVICE_ROLE_KEY": "SET" if os.getenv("SUPABASE_SERVICE_ROLE_KEY") else "NOT SET",
-        "current_supabase_key_type": "service_role" if os.getenv("SUPABASE_SERVICE_ROLE_KEY") else "anonymous",
+        **_ENV_SNAPSHOT,
         "supabase_client_exists": bool(supabase),
-        "all_env_vars": {k: v for k, v in os.environ.items() if "SUPABASE" in k}
+        "all_env_vars": _SUPABASE_ENV_VARS
     }
 
 @app.get("/debug/agents-table")
@@ -485,22 +1192,11 @@ async def debug_agents_table():
 @app.get("/", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    api_status = {
-        "OpenAI": bool(os.getenv("OPENAI_API_KEY")),
-        "RapidAPI": bool(os.getenv("RAPIDAPI_KEY")),
-        "Hunter.io": bool(os.getenv("HUNTER_API_KEY")),
-        "Instantly.ai": bool(os.getenv("INSTANTLY_API_KEY")),
-        "JobSpy_API": True  # Using external API
-    }
-    
-    # Only email discovery is in demo mode without Hunter.io
-    demo_mode = not bool(os.getenv("HUNTER_API_KEY"))
-    
-    return HealthResponse(
+    return HealthResponse.model_construct(
         status="healthy",
-        timestamp=datetime.now().isoformat(),
-        api_status=api_status,
-        demo_mode=demo_mode
+        timestamp=_now_iso(),
+        api_status=_API_STATUS,
+        demo_mode=_DEMO_MODE
     )
 
 @app.get("/lead-lists")
@@ -546,7 +1242,7 @@ async def search_jobs(request: JobSearchRequest):
         tracker = CompanyProcessingTracker(batch_id)
         
         # Parse query
-        search_params = job_scraper.parse_query(request.query)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
         
         # Override hours_old with request parameter if provided
         if request.hours_old != 720:  # If not default
@@ -558,8 +1254,8 @@ async def search_jobs(request: JobSearchRequest):
         await log_to_supabase(batch_id, f"🚀 Starting job search: {request.query}", "info")
         
         # Initialize tracking variables
-        processed_companies = set()
-        companies_analyzed = []
+        processed_companies = set()  # normalize_company() keys
+        companies_analyzed: List[CompanyAnalysis] = []
         campaigns_created = []
         leads_added = 0
         hunter_attempts = 0
@@ -570,28 +1266,237 @@ async def search_jobs(request: JobSearchRequest):
         all_jobs = []
         total_jobs_found = 0
         
-        # Process each city sequentially
-        for city in job_scraper.us_cities[:10]:  # Limit to first 10 cities for testing
+        company_semaphore = asyncio.Semaphore(COMPANY_CONCURRENCY)
+        # Companies with Hunter.io leads in the current city, sent to Instantly.ai in one call
+        pending_leads: List[Dict[str, Any]] = []
+        
+        async def send_city_leads(city: str):
+            """Send the city's collected Hunter.io leads to Instantly.ai in one Edge Function call"""
+            nonlocal leads_added
+            if not pending_leads:
+                return
+            city_leads = pending_leads[:]
+            pending_leads.clear()
+            total_leads = sum(len(entry["hunter_emails"]) for entry in city_leads)
+            await log_to_supabase(batch_id, f"🚀 Sending {total_leads} leads from {len(city_leads)} companies in {city} to Instantly.ai", "info", processing_stage="instantly_start")
+            try:
+                if not SERVICE_ROLE_KEY:
+                    await log_to_supabase(batch_id, f"❌ SUPABASE_SERVICE_ROLE_KEY not configured", "error", processing_stage="instantly_error")
+                    return
+                
+                response = await http_client.post(
+                    EDGE_FUNCTION_URL,
+                    json={"batch_id": batch_id, "action": "create_leads", "companies": city_leads},
+                    headers=EDGE_FUNCTION_HEADERS,
+                    timeout=60.0
+                )
+                
+                if response.status_code == 200:
+                    result = json_loads(response.content)
+                    if result.get('success'):
+                        created_leads = result.get('created_leads', [])
+                        campaign_id = result.get('summary', {}).get('campaign_id', '')
+                        leads_added += len(created_leads)
+                        campaigns_created.append(campaign_id)
+                        await log_to_supabase(batch_id, f"✅ Successfully sent {len(created_leads)} leads to Instantly.ai", "success", processing_stage="instantly_success")
+                        created_per_company = Counter(lead.get('contact', {}).get('company_name', '') for lead in created_leads)
+                        for entry in city_leads:
+                            company = entry["company"]
+                            tracker.save_instantly_campaign(company, campaign_id, f"Coogi Agent - {company}", created_per_company.get(company, 0))
+                    else:
+                        error = result.get('error', 'Edge Function error')
+                        await log_to_supabase(batch_id, f"❌ Edge Function returned error: {error}", "error", processing_stage="instantly_error")
+                        for entry in city_leads:
+                            tracker.save_instantly_campaign(entry["company"], error=error)
+                else:
+                    await log_to_supabase(batch_id, f"❌ Edge Function call failed: {response.status_code} - {response.text}", "error", processing_stage="instantly_error")
+                    for entry in city_leads:
+                        tracker.save_instantly_campaign(entry["company"], error=f"Edge Function HTTP {response.status_code}")
+            
+            except Exception as e:
+                await log_to_supabase(batch_id, f"❌ Error calling Edge Function for {city}: {str(e)}", "error", processing_stage="instantly_error")
+                for entry in city_leads:
+                    tracker.save_instantly_campaign(entry["company"], error=str(e))
+        
+        async def process_company(job: Dict[str, Any], company: str, job_title: str, job_url: str, job_fingerprint: int,
+                                  analysis: Dict[str, Any]) -> bool:
+            """Run one company through domain → LinkedIn → RapidAPI → Hunter.io → Instantly; True if analyzed"""
+            nonlocal processed_count
+            async with company_semaphore:
+                # Process this company through the complete flow
+                await log_to_supabase(batch_id, f"🔍 Processing company: {company} - {job_title}", "info", company, job_title, job_url, "company_start")
+                
+                try:
+                    # STEP 1: Domain Search (memoized Clearout lookup)
+                    domain = await resolve_domain(company)
+                    logger.info("🌐 Domain result for %s: %s", company, domain)
+                    job['company_website'] = domain
+                    tracker.save_domain_search(company, domain)
+                    
+                    # Log domain status before Hunter.io
+                    if domain:
+                        await log_to_supabase(batch_id, f"✅ Domain found for {company}: {domain}", "success", company, job_title, job_url, "domain_found")
+                    else:
+                        await log_to_supabase(batch_id, f"⚠️ No domain found for {company} - Hunter.io may still work with internal domain finding", "warning", company, job_title, job_url, "domain_not_found")
+                    
+                    # STEP 2: LinkedIn Resolution (from the city-wide OpenAI batch analysis)
+                    linkedin_identifier = analysis.get('linkedin_identifier', company.lower().replace(" ", "-"))
+                    tracker.save_linkedin_resolution(company, linkedin_identifier)
+                    
+                    # STEP 3: RapidAPI Analysis (one profile call, drawn from the shared RapidAPI budget)
+                    description = job.get('description') or job.get('job_level') or ''
+                    await rate_limiter.acquire()
+                    result = await run_in_pool(
+                        API_POOL,
+                        contact_finder.find_contacts,
+                        company=company,
+                        linkedin_identifier=linkedin_identifier,
+                        role_hint=job_title,
+                        keywords=job_scraper.extract_keywords(description),
+                        company_website=domain
+                    )
+                    
+                    contacts, has_ta_team, employee_roles, company_found = result
+                    await log_to_supabase(batch_id, f"📊 Found {len(contacts)} contacts, TA team: {has_ta_team}", "info", company, job_title, job_url, "contact_analysis")
+                    tracker.save_rapidapi_analysis(company, has_ta_team, contacts, employee_roles, company_found)
+                    
+                    # STEP 4: Hunter.io (if no TA team and company found)
+                    hunter_emails = []
+                    if not has_ta_team and company_found and domain:
+                        await log_to_supabase(batch_id, f"📡 Attempting Hunter.io lookup for: {company} using domain: {domain}", "info", company, job_title, job_url, "hunter_lookup")
+                    elif not has_ta_team and company_found and not domain:
+                        await log_to_supabase(batch_id, f"📡 Attempting Hunter.io lookup for: {company} (no domain - Hunter.io will use internal domain finding)", "info", company, job_title, job_url, "hunter_lookup_no_domain")
+                    else:
+                        await log_to_supabase(batch_id, f"⏭️ Skipping Hunter.io for {company} (has TA team or company not found)", "info", company, job_title, job_url, "hunter_skipped")
+                    
+                    if not has_ta_team and company_found:
+                        try:
+                            hunter_emails = await find_hunter_emails(
+                                company=company,
+                                job_title=job_title,
+                                employee_roles=employee_roles,
+                                company_website=domain
+                            )
+                            
+                            if hunter_emails:
+                                await log_to_supabase(batch_id, f"✅ Found {len(hunter_emails)} Hunter.io emails for {company}", "success", company, job_title, job_url, "hunter_success")
+                                tracker.save_hunter_emails(company, job_title, job_url, hunter_emails)
+                                await log_to_supabase(batch_id, f"💾 Saved {len(hunter_emails)} emails to database for {company}", "info", company, job_title, job_url, "database_save")
+                            else:
+                                await log_to_supabase(batch_id, f"⚠️ No Hunter.io emails found for {company}", "warning", company, job_title, job_url, "hunter_no_emails")
+                                tracker.save_hunter_emails(company, job_title, job_url, [])
+                        
+                        except Exception as e:
+                            await log_to_supabase(batch_id, f"❌ Hunter.io error for {company}: {str(e)}", "error", company, job_title, job_url, "hunter_error")
+                            tracker.save_hunter_emails(company, job_title, job_url, [], error=str(e))
+                    
+                    # STEP 5: Instantly.ai (if requested and emails found) - collected here and
+                    # sent for the whole city once its companies have been processed
+                    campaign_id = None
+                    if request.create_campaigns and hunter_emails:
+                        # Hunter.io emails for a company share its domain - take it from the first one
+                        _, at, hunter_domain = hunter_emails[0].get("email", "").rpartition("@")
+                        pending_leads.append({
+                            "company": company,
+                            "job_title": job_title,
+                            "hunter_emails": hunter_emails,
+                            "domain": hunter_domain if at else None
+                        })
+                    
+                    # Create company analysis record
+                    recommendation = "SKIP - Has TA team" if has_ta_team else "PROCESS - Target company"
+                    companies_analyzed.append(CompanyAnalysis(
+                        company=company,
+                        job_title=job_title,
+                        job_url=job_url,
+                        has_ta_team=has_ta_team,
+                        contacts_found=len(contacts),
+                        top_contacts=contacts[:5],
+                        hunter_emails=hunter_emails,
+                        employee_roles=employee_roles,
+                        company_website=domain,
+                        company_found=company_found,
+                        recommendation=recommendation,
+                        timestamp=_now_iso()
+                    ))
+                    
+                    # Save company processing summary
+                    tracker.save_company_summary(
+                        company=company,
+                        job_title=job_title,
+                        job_url=job_url,
+                        domain_found=bool(domain),
+                        linkedin_resolved=True,
+                        rapidapi_analyzed=True,
+                        hunter_emails_found=bool(hunter_emails),
+                        instantly_campaign_created=bool(campaign_id),
+                        final_recommendation=recommendation
+                    )
+                    
+                    await log_to_supabase(batch_id, f"✅ Completed analysis for {company}: {recommendation}", "success", company, job_title, job_url, "company_analysis_complete")
+                    
+                    # Mark as processed
+                    memory_manager.mark_job_processed(job_fingerprint)
+                    processed_count += 1
+                    await flush_tracker_if_full(tracker)
+                    return True
+                
+                except Exception as e:
+                    logger.error("Error analyzing %s: %s", company, e)
+                    await log_to_supabase(batch_id, f"❌ Error analyzing {company}: {str(e)}", "error", company, job_title, job_url, "company_error")
+                    
+                    # Save error summary
+                    tracker.save_company_summary(
+                        company=company,
+                        job_title=job_title,
+                        job_url=job_url,
+                        domain_found=False,
+                        linkedin_resolved=False,
+                        rapidapi_analyzed=False,
+                        hunter_emails_found=False,
+                        instantly_campaign_created=False,
+                        final_recommendation=f"ERROR - {str(e)}",
+                        error=str(e)
+                    )
+                    
+                    memory_manager.mark_job_processed(job_fingerprint)
+                    return False
+        
+        # Fetch jobs for all cities concurrently, bounded to respect JobSpy rate limits
+        cities = job_scraper.us_cities[:10]  # Limit to first 10 cities for testing
+        jobspy_semaphore = asyncio.Semaphore(JOBSPY_CONCURRENCY)
+        
+        # JobSpy arguments are the same for every city - only the location changes
+        base_kwargs = {
+            "search_term": search_params.get('search_term', ''),
+            "hours_old": search_params.get('hours_old', 720),
+            "job_type": search_params.get('job_type', ''),
+            "is_remote": search_params.get('is_remote', False),
+            "site_name": search_params.get('site_name', ["indeed", "linkedin", "zip_recruiter", "google", "glassdoor"]),
+            "results_wanted": search_params.get('results_wanted', 200),
+            "offset": search_params.get('offset', 0),
+            "distance": search_params.get('distance', 25),
+            "easy_apply": search_params.get('easy_apply', False),
+            "country_indeed": search_params.get('country_indeed', 'us'),
+            "google_search_term": search_params.get('google_search_term', ''),
+            "linkedin_fetch_description": search_params.get('linkedin_fetch_description', False),
+            "verbose": search_params.get('verbose', False)
+        }
+        
+        async def fetch_city_jobs(city: str) -> List[Dict[str, Any]]:
+            async with jobspy_semaphore:
+                return await cached_job_search(job_scraper._call_jobspy_api, location=city, **base_kwargs)
+        
+        await log_to_supabase(batch_id, f"🌐 Fetching jobs for {len(cities)} cities ({JOBSPY_CONCURRENCY} at a time)", "info")
+        city_results = await asyncio.gather(*(fetch_city_jobs(city) for city in cities), return_exceptions=True)
+        
+        # Process each city's companies in order
+        for city, city_jobs in zip(cities, city_results):
             await log_to_supabase(batch_id, f"🏙️ Processing city: {city}", "info")
             
             try:
-                # Get jobs for this specific city
-                city_jobs = job_scraper._call_jobspy_api(
-                    search_term=search_params.get('search_term', ''),
-                    location=city,
-                    hours_old=search_params.get('hours_old', 720),
-                    job_type=search_params.get('job_type', ''),
-                    is_remote=search_params.get('is_remote', False),
-                    site_name=search_params.get('site_name', ["indeed", "linkedin", "zip_recruiter", "google", "glassdoor"]),
-                    results_wanted=search_params.get('results_wanted', 200),
-                    offset=search_params.get('offset', 0),
-                    distance=search_params.get('distance', 25),
-                    easy_apply=search_params.get('easy_apply', False),
-                    country_indeed=search_params.get('country_indeed', 'us'),
-                    google_search_term=search_params.get('google_search_term', ''),
-                    linkedin_fetch_description=search_params.get('linkedin_fetch_description', False),
-                    verbose=search_params.get('verbose', False)
-                )
+                if isinstance(city_jobs, Exception):
+                    raise city_jobs
                 
                 if not city_jobs:
                     await log_to_supabase(batch_id, f"⚠️ No jobs found in {city}", "warning")
@@ -600,300 +1505,86 @@ async def search_jobs(request: JobSearchRequest):
                 await log_to_supabase(batch_id, f"✅ Found {len(city_jobs)} jobs in {city}", "success")
                 total_jobs_found += len(city_jobs)
                 
-                # Process all companies in this city immediately
-                city_companies_processed = 0
-                for job in city_jobs:
-                    # Check if already processed
-                    job_fingerprint = memory_manager.create_job_fingerprint(job)
-                    if memory_manager.is_job_processed(job_fingerprint):
-                        continue
-                    
+                # Pick the first job per unique company, then process the companies concurrently
+                blacklisted = blacklist_manager.as_set()
+                city_targets = []
+                for company_key, job in first_job_per_company(city_jobs).items():
                     company = job.get('company', '')
-                    job_title = job.get('title', '')
-                    job_url = job.get('job_url', '')
-                    
-                    # Skip if we've already analyzed this company
-                    if company in processed_companies:
-                        logger.info(f"Skipping {company} - already analyzed")
-                        memory_manager.mark_job_processed(job_fingerprint)
+                    # Skip if we've already analyzed this company (cheap set probes first)
+                    if company_key in processed_companies:
+                        logger.info("Skipping %s - already analyzed", company)
                         continue
                     
                     # Check blacklist BEFORE making any API calls
-                    if blacklist_manager.is_blacklisted(company):
-                        logger.info(f"⏭️  Skipping {company} - blacklisted")
-                        memory_manager.mark_job_processed(job_fingerprint)
+                    if company_key in blacklisted:
+                        logger.info("⏭️  Skipping %s - blacklisted", company)
+                        processed_companies.add(company_key)
                         continue
                     
-                    # Process this company through the complete flow
-                    await log_to_supabase(batch_id, f"🔍 Processing company: {company} - {job_title}", "info", company, job_title, job_url, "company_start")
-            
-                    try:
-                        # STEP 1: Domain Search
-                        import asyncio
-                        
-                        # Make domain finding call async using httpx
-                        # Inline domain finding logic
-                        try:
-                                url = "https://api.clearout.io/public/companies/autocomplete"
-                                params = {"query": company}
-                                
-                                logger.info(f"🌐 Making domain finding call for {company}")
-                                async with httpx.AsyncClient() as client:
-                                    response = await client.get(url, params=params, timeout=30.0)
-                                    
-                                    logger.info(f"🌐 Clearout API response status: {response.status_code}")
-                                    logger.info(f"🌐 Clearout API response text: {response.text}")
-                                    
-                                    if response.status_code == 200:
-                                        data = response.json()
-                                        logger.info(f"🌐 Clearout API parsed data: {data}")
-                                        
-                                        if data.get('status') == 'success' and data.get('data'):
-                                            # Get the best match with highest confidence
-                                            best_match = None
-                                            best_confidence = 0
-                                            
-                                            logger.info(f"🌐 Processing {len(data['data'])} companies from Clearout API")
-                                            
-                                            for company_data in data['data']:
-                                                confidence = company_data.get('confidence_score', 0)
-                                                found_domain = company_data.get('domain')
-                                                logger.info(f"🌐 Company: {company_data.get('name', 'Unknown')}, Domain: {found_domain}, Confidence: {confidence}")
-                                                
-                                                if confidence > best_confidence and confidence >= 50:
-                                                    best_confidence = confidence
-                                                    best_match = found_domain
-                                            
-                                            if best_match:
-                                                logger.info(f"🌐 Found domain for {company}: {best_match}")
-                                                domain = best_match
-                                            else:
-                                                logger.warning(f"⚠️  No high-confidence domain found for {company} (best confidence: {best_confidence})")
-                                        else:
-                                            logger.warning(f"⚠️  Clearout API failed for {company}: {data.get('message', 'Unknown error')}")
-                                    else:
-                                        logger.warning(f"⚠️  Clearout API error for {company}: {response.status_code}")
-                                
-                                if not domain:
-                                    logger.warning(f"⚠️  No domain found for {company}")
-                                    
-                        except Exception as e:
-                            logger.error(f"❌ Domain finding failed for {company}: {e}")
-                        
-                        domain = None
-                        logger.info(f"🌐 Domain result for {company}: {domain}")
-                        job['company_website'] = domain
-                        
-                        # Log domain status before Hunter.io
-                        if domain:
-                            await log_to_supabase(batch_id, f"✅ Domain found for {company}: {domain}", "success", company, job_title, job_url, "domain_found")
-                        else:
-                            await log_to_supabase(batch_id, f"⚠️ No domain found for {company} - Hunter.io may still work with internal domain finding", "warning", company, job_title, job_url, "domain_not_found")
-                
-                        # STEP 2: LinkedIn Resolution (via OpenAI batch analysis)
-                        analysis = contact_finder.batch_analyze_companies([company]).get(company, {})
-                        linkedin_identifier = analysis.get('linkedin_identifier', company.lower().replace(" ", "-"))
-                        tracker.save_linkedin_resolution(company, linkedin_identifier)
-                        
-                        # STEP 3: RapidAPI Analysis
-                        description = job.get('description') or job.get('job_level') or ''
-                        result = contact_finder.find_contacts(
-                            company=company,
-                            linkedin_identifier=linkedin_identifier,
-                            role_hint=job_title,
-                            keywords=job_scraper.extract_keywords(description),
-                            company_website=domain
-                        )
-                        
-                        contacts, has_ta_team, employee_roles, company_found = result
-                        await log_to_supabase(batch_id, f"📊 Found {len(contacts)} contacts, TA team: {has_ta_team}", "info", company, job_title, job_url, "contact_analysis")
-                        tracker.save_rapidapi_analysis(company, has_ta_team, contacts, employee_roles, company_found)
-                        
-                        # STEP 4: Hunter.io (if no TA team and company found)
-                        hunter_emails = []
-                        if not has_ta_team and company_found and domain:
-                            await log_to_supabase(batch_id, f"📡 Attempting Hunter.io lookup for: {company} using domain: {domain}", "info", company, job_title, job_url, "hunter_lookup")
-                        elif not has_ta_team and company_found and not domain:
-                            await log_to_supabase(batch_id, f"📡 Attempting Hunter.io lookup for: {company} (no domain - Hunter.io will use internal domain finding)", "info", company, job_title, job_url, "hunter_lookup_no_domain")
-                        else:
-                            await log_to_supabase(batch_id, f"⏭️ Skipping Hunter.io for {company} (has TA team or company not found)", "info", company, job_title, job_url, "hunter_skipped")
-                            
-                        if not has_ta_team and company_found:
-                            try:
-                                hunter_emails = contact_finder.find_hunter_emails_for_target_company(
-                                    company=company,
-                                    job_title=job_title,
-                                    employee_roles=employee_roles,
-                                    company_website=domain
-                                )
-                                
-                                if hunter_emails:
-                                    await log_to_supabase(batch_id, f"✅ Found {len(hunter_emails)} Hunter.io emails for {company}", "success", company, job_title, job_url, "hunter_success")
-                                    tracker.save_hunter_emails(company, job_title, job_url, hunter_emails)
-                                    # Add a small delay to ensure database write completes
-                                    await asyncio.sleep(1)
-                                    await log_to_supabase(batch_id, f"💾 Saved {len(hunter_emails)} emails to database for {company}", "info", company, job_title, job_url, "database_save")
-                                else:
-                                    await log_to_supabase(batch_id, f"⚠️ No Hunter.io emails found for {company}", "warning", company, job_title, job_url, "hunter_no_emails")
-                                    tracker.save_hunter_emails(company, job_title, job_url, [])
-                                    
-                            except Exception as e:
-                                await log_to_supabase(batch_id, f"❌ Hunter.io error for {company}: {str(e)}", "error", company, job_title, job_url, "hunter_error")
-                                tracker.save_hunter_emails(company, job_title, job_url, [], error=str(e))
-                        
-                        # STEP 5: Instantly.ai (if requested and emails found)
-                        campaign_id = None
-                        if request.create_campaigns and hunter_emails:
-                            await log_to_supabase(batch_id, f"🚀 Creating Instantly campaign for {company}", "info", company, job_title, job_url, "instantly_start")
-                            try:
-                                # Call the Edge Function to send leads to Instantly.ai
-                                import httpx
-                                
-                                # Prepare the request for the Edge Function
-                                edge_function_url = f"{os.getenv('SUPABASE_URL', '')}/functions/v1/send-to-instantly"
-                                
-                                # Extract domain from Hunter.io emails
-                                hunter_domain = None
-                                if hunter_emails and len(hunter_emails) > 0:
-                                    # Get domain from first email
-                                    first_email = hunter_emails[0].get("email", "")
-                                    if "@" in first_email:
-                                        hunter_domain = first_email.split("@")[1]
-                                
-                                edge_function_payload = {
-                                    "batch_id": batch_id,
-                                    "action": "create_leads",
-                                    "hunter_emails": hunter_emails,  # Pass emails directly
-                                    "company": company,
-                                    "job_title": job_title,
-                                    "domain": hunter_domain  # Use domain from Hunter.io emails
-                                }
-                                
-                                # Get the service role key for the Edge Function
-                                service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-                                if not service_role_key:
-                                    await log_to_supabase(batch_id, f"❌ SUPABASE_SERVICE_ROLE_KEY not configured", "error", company, job_title, job_url, "instantly_error")
-                                    continue
-                                
-                                headers = {
-                                    "Authorization": f"Bearer {service_role_key}",
-                                    "Content-Type": "application/json"
-                                }
-                                
-                                await log_to_supabase(batch_id, f"📡 Calling Edge Function to send {len(hunter_emails)} leads to Instantly.ai", "info", company, job_title, job_url, "instantly_edge_call")
-                                
-                                async with httpx.AsyncClient() as client:
-                                    response = await client.post(
-                                        edge_function_url,
-                                        json=edge_function_payload,
-                                        headers=headers,
-                                        timeout=30.0
-                                    )
-                                
-                                if response.status_code == 200:
-                                    result = response.json()
-                                    if result.get('success'):
-                                        created_leads = result.get('created_leads', [])
-                                        leads_added += len(created_leads)
-                                        campaigns_created.append(result.get('summary', {}).get('campaign_id', ''))
-                                        await log_to_supabase(batch_id, f"✅ Successfully sent {len(created_leads)} leads to Instantly.ai", "success", company, job_title, job_url, "instantly_success")
-                                        tracker.save_instantly_campaign(company, result.get('summary', {}).get('campaign_id', ''), f"Coogi Agent - {company}", len(created_leads))
-                                    else:
-                                        await log_to_supabase(batch_id, f"❌ Edge Function returned error: {result.get('error', 'Unknown error')}", "error", company, job_title, job_url, "instantly_error")
-                                        tracker.save_instantly_campaign(company, error=result.get('error', 'Edge Function error'))
-                                else:
-                                    await log_to_supabase(batch_id, f"❌ Edge Function call failed: {response.status_code} - {response.text}", "error", company, job_title, job_url, "instantly_error")
-                                    tracker.save_instantly_campaign(company, error=f"Edge Function HTTP {response.status_code}")
-                                    
-                            except Exception as e:
-                                await log_to_supabase(batch_id, f"❌ Error calling Edge Function for {company}: {str(e)}", "error", company, job_title, job_url, "instantly_error")
-                                tracker.save_instantly_campaign(company, error=str(e))
-                        
-                        # Create company analysis record
-                        recommendation = "SKIP - Has TA team" if has_ta_team else "PROCESS - Target company"
-                        company_analysis = {
-                            "company": company,
-                            "job_title": job_title,
-                            "job_url": job_url,
-                            "has_ta_team": has_ta_team,
-                            "contacts_found": len(contacts),
-                            "top_contacts": contacts[:5],
-                            "hunter_emails": hunter_emails,
-                            "employee_roles": employee_roles,
-                            "company_website": domain,
-                            "company_found": company_found,
-                            "recommendation": recommendation,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        companies_analyzed.append(company_analysis)
-                        
-                        # Save company processing summary
-                        tracker.save_company_summary(
-                            company=company,
-                            job_title=job_title,
-                            job_url=job_url,
-                            domain_found=bool(domain),
-                            linkedin_resolved=True,
-                            rapidapi_analyzed=True,
-                            hunter_emails_found=bool(hunter_emails),
-                            instantly_campaign_created=bool(campaign_id),
-                            final_recommendation=recommendation
-                        )
-                        
-                        await log_to_supabase(batch_id, f"✅ Completed analysis for {company}: {recommendation}", "success", company, job_title, job_url, "company_analysis_complete")
-                        
-                        # Mark as processed
-                        processed_companies.add(company)
-                        memory_manager.mark_job_processed(job_fingerprint)
-                        processed_count += 1
-                        
-                        city_companies_processed += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error analyzing {company}: {e}")
-                        await log_to_supabase(batch_id, f"❌ Error analyzing {company}: {str(e)}", "error", company, job_title, job_url, "company_error")
-                        
-                        # Save error summary
-                        tracker.save_company_summary(
-                            company=company,
-                            job_title=job_title,
-                            job_url=job_url,
-                            domain_found=False,
-                            linkedin_resolved=False,
-                            rapidapi_analyzed=False,
-                            hunter_emails_found=False,
-                            instantly_campaign_created=False,
-                            final_recommendation=f"ERROR - {str(e)}",
-                            error=str(e)
-                        )
-                        
-                        memory_manager.mark_job_processed(job_fingerprint)
+                    # Check if already processed
+                    job_fingerprint = memory_manager.create_job_fingerprint(job)
+                    if memory_manager.is_job_processed(job_fingerprint):
                         continue
+                    
+                    processed_companies.add(company_key)
+                    city_targets.append((job, company, job.get('title', ''), job.get('job_url', ''), job_fingerprint))
+                
+                # Resolve LinkedIn identifiers for all of the city's companies in one OpenAI call
+                analyses = {}
+                if city_targets:
+                    analyses = await run_in_pool(
+                        LLM_POOL,
+                        contact_finder.batch_analyze_companies,
+                        [target[1] for target in city_targets]
+                    )
+                
+                outcomes = await asyncio.gather(*(
+                    process_company(*target, analyses.get(target[1], {}))
+                    for target in city_targets
+                ))
+                city_companies_processed = sum(1 for analyzed in outcomes if analyzed)
+                
+                # Send the city's leads to Instantly.ai (handles its own errors)
+                await send_city_leads(city)
+                
+                # Write the city's tracking rows in bulk
+                await flush_tracker(tracker)
                 
                 # Log city completion
                 await log_to_supabase(batch_id, f"✅ Completed {city}: {city_companies_processed} companies processed", "success")
                 
             except Exception as e:
-                logger.error(f"Error processing city {city}: {e}")
+                logger.error("Error processing city %s: %s", city, e)
                 await log_to_supabase(batch_id, f"❌ Error processing city {city}: {str(e)}", "error")
                 continue
-            
-            # Rate limiting: Wait between cities
-            if city != job_scraper.us_cities[:10][-1]:  # Not the last city
-                await log_to_supabase(batch_id, "⏳ Rate limiting: Waiting 30 seconds before next city...", "info")
-                time.sleep(30)
+        
+        # Send leads and write tracking rows left over from a city that failed part-way
+        await send_city_leads("remaining cities")
+        await flush_tracker(tracker)
         
         # Final summary logging
         logger.info(f"📊 Hunter.io Summary: {hunter_attempts} attempts, {hunter_hits} emails found")
         await log_to_supabase(batch_id, f"📊 Hunter.io Summary: {hunter_attempts} attempts, {hunter_hits} emails found", "info")
         await log_to_supabase(batch_id, f"🎉 Search completed: {len(companies_analyzed)} companies analyzed", "success")
         
-        return JobSearchResponse(
-            companies_analyzed=companies_analyzed,
+        if msgspec:
+            response = JobSearchResponseStruct(
+                companies_analyzed=companies_analyzed,
+                jobs_found=total_jobs_found,
+                total_processed=processed_count,
+                search_query=request.query,
+                timestamp=_now_iso(),
+                campaigns_created=campaigns_created if campaigns_created else None,
+                leads_added=leads_added
+            )
+            return Response(content=msgspec.json.encode(response), media_type="application/json")
+        
+        return JobSearchResponse.model_construct(
+            companies_analyzed=[asdict(analysis) for analysis in companies_analyzed],
             jobs_found=total_jobs_found,
             total_processed=processed_count,
             search_query=request.query,
-            timestamp=datetime.now().isoformat(),
+            timestamp=_now_iso(),
             campaigns_created=campaigns_created if campaigns_created else None,
             leads_added=leads_added
         )
@@ -906,7 +1597,9 @@ async def search_jobs(request: JobSearchRequest):
 async def generate_message(request: MessageGenerationRequest):
     """Generate personalized outreach message"""
     try:
-        message = email_generator.generate_outreach(
+        message = await run_in_pool(
+            LLM_POOL,
+            email_generator.generate_outreach,
             job_title=request.job_title,
             company=request.company,
             contact_title=request.contact_title,
@@ -915,7 +1608,9 @@ async def generate_message(request: MessageGenerationRequest):
             additional_context=request.additional_context
         )
         
-        subject_line = email_generator.generate_subject_line(
+        subject_line = await run_in_pool(
+            LLM_POOL,
+            email_generator.generate_subject_line,
             request.job_title,
             request.company
         )
@@ -923,24 +1618,62 @@ async def generate_message(request: MessageGenerationRequest):
         return MessageGenerationResponse(
             message=message,
             subject_line=subject_line,
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
         logger.error(f"Error generating message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def generate_and_store_message(lead_id: str, job_title: str, company: str, contact_title: str, job_url: str):
+    """Generate an outreach message off the request path and store it for later retrieval"""
+    try:
+        message = await run_in_pool(
+            LLM_POOL,
+            email_generator.generate_outreach,
+            job_title=job_title,
+            company=company,
+            contact_title=contact_title,
+            job_url=job_url
+        )
+    except Exception as e:
+        logger.error(f"Error generating message for lead {lead_id}: {e}")
+        return
+    
+    stored = {"message": message, "timestamp": _now_iso()}
+    _LEAD_MESSAGES.set(lead_id, stored)
+    if redis_client and redis_ok():
+        try:
+            await redis_client.set("lead_message:" + lead_id, json_dumps(stored), ex=LEAD_MESSAGE_TTL)
+        except Exception as e:
+            redis_failed("lead message store", e)
+
+@app.get("/lead/{lead_id}/message")
+async def get_lead_message(lead_id: str):
+    """Get the outreach message generated in the background for a lead"""
+    stored = _LEAD_MESSAGES.get(lead_id)
+    if stored is None and redis_client and redis_ok():
+        try:
+            raw = await redis_client.get("lead_message:" + lead_id)
+            if raw is not None:
+                stored = json_loads(raw)
+        except Exception as e:
+            redis_failed("lead message store", e)
+    if not stored:
+        return {"lead_id": lead_id, "status": "pending", "message": ""}
+    return {"lead_id": lead_id, "status": "ready", "message": stored["message"], "timestamp": stored["timestamp"]}
+
 @app.get("/memory-stats")
 async def get_memory_stats():
     """Get memory/tracking statistics"""
     stats = memory_manager.get_memory_stats()
-    return {"stats": stats, "timestamp": datetime.now().isoformat()}
+    return {"stats": stats, "timestamp": _now_iso()}
 
 @app.delete("/memory")
 async def clear_memory():
     """Clear all memory data"""
     memory_manager.clear_memory()
-    return {"message": "Memory cleared successfully", "timestamp": datetime.now().isoformat()}
+    return {"message": "Memory cleared successfully", "timestamp": _now_iso()}
 
 @app.post("/analyze-companies", response_model=CompanyAnalysisResponse)
 async def analyze_companies(request: CompanyAnalysisRequest):
@@ -954,57 +1687,73 @@ async def analyze_companies(request: CompanyAnalysisRequest):
         analyzer.clear_skip_history()
         
         # Parse query and search for jobs
-        search_params = job_scraper.parse_query(request.query)
-        jobs = job_scraper.search_jobs(search_params, max_results=request.max_companies * 3)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
+        jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=request.max_companies * 3)
         
         if not jobs:
             raise HTTPException(status_code=404, detail="No jobs found matching criteria")
         
         target_companies = []
-        processed_companies = set()
+        
+        # Collect unique companies up front so people data can be fetched concurrently
+        companies = list(dict.fromkeys(job['company'] for job in jobs if job.get('company')))[:request.max_companies]
+        processed_companies = set(companies)
+        
+        # Get people data from SaleLeads API over one pooled HTTP/2 connection
+        people_url = "https://fresh-linkedin-scraper-api.p.rapidapi.com/api/v1/company/people"
+        headers = {
+            "X-RapidAPI-Key": os.getenv("RAPIDAPI_KEY", ""),
+            "X-RapidAPI-Host": "fresh-linkedin-scraper-api.p.rapidapi.com"
+        }
+        semaphore = asyncio.Semaphore(RAPIDAPI_CONCURRENCY)
+        
+        async def fetch_people(company: str) -> List[Dict[str, Any]]:
+            cached = _PEOPLE_CACHE.get(company.strip().lower())
+            if cached is not None:
+                return cached
+            async with semaphore:
+                for attempt in range(RAPIDAPI_MAX_RETRIES):
+                    await rate_limiter.acquire()
+                    try:
+                        logger.info("Fetching people data for %s (attempt %s)", company, attempt + 1)
+                        people_resp = await http_client.get(people_url, params={"company": company, "page": 1}, headers=headers, timeout=15.0)
+                    except httpx.HTTPError as e:
+                        logger.warning("People API request failed for %s: %s", company, e)
+                        await asyncio.sleep(2 ** attempt + random.random())
+                        continue
+                    pause = rate_limiter.update_from_headers(people_resp.headers)
+                    
+                    if people_resp.status_code == 200:
+                        people_response = json_loads(people_resp.content)
+                        if people_response.get("success", False):
+                            people_data = people_response.get("data", [])
+                            logger.info("Found %s people at %s", len(people_data), company)
+                            _PEOPLE_CACHE.set(company.strip().lower(), people_data)
+                            return people_data
+                        return []
+                    elif people_resp.status_code == 429:
+                        # The limiter honours Retry-After; without it, back off with jitter so workers don't retry in lockstep
+                        logger.warning("Rate limit hit for %s, retrying", company)
+                        if not pause:
+                            await asyncio.sleep(2 ** attempt + random.random())
+                    else:
+                        logger.warning("People API failed for %s: %s", company, people_resp.status_code)
+                        return []
+                
+                # Still proceed with basic analysis without people data
+                logger.warning("Rate limit retries exhausted for %s, skipping detailed analysis", company)
+                return []
+        
+        people_results = await asyncio.gather(
+            *(fetch_people(company) for company in companies),
+            return_exceptions=True
+        )
         
         # Analyze unique companies
-        for job in jobs:
-            company = job.get('company', '')
-            if not company or company in processed_companies:
-                continue
-            
-            processed_companies.add(company)
-            if len(processed_companies) > request.max_companies:
-                break
-            
-            # Get people data from SaleLeads API with rate limiting
+        for company, people_data in zip(companies, people_results):
             try:
-                people_data = []
-                
-                # Add delay between API calls to respect rate limits
-                if processed_companies:  # Not the first company
-                    time.sleep(2)  # 2 second delay between companies
-                
-                people_url = "https://fresh-linkedin-scraper-api.p.rapidapi.com/api/v1/company/people"
-                headers = {
-                    "X-RapidAPI-Key": os.getenv("RAPIDAPI_KEY", ""),
-                    "X-RapidAPI-Host": "fresh-linkedin-scraper-api.p.rapidapi.com"
-                }
-                
-                logger.info(f"Fetching people data for {company} (with rate limiting)")
-                people_resp = requests.get(
-                    people_url, 
-                    params={"company": company, "page": 1}, 
-                    headers=headers, 
-                    timeout=15
-                )
-                
-                if people_resp.status_code == 200:
-                    people_response = people_resp.json()
-                    if people_response.get("success", False):
-                        people_data = people_response.get("data", [])
-                        logger.info(f"Found {len(people_data)} people at {company}")
-                elif people_resp.status_code == 429:
-                    logger.warning(f"Rate limit hit for {company}, skipping detailed analysis")
-                    # Still proceed with basic analysis without people data
-                else:
-                    logger.warning(f"People API failed for {company}: {people_resp.status_code}")
+                if isinstance(people_data, Exception):
+                    raise people_data
                 
                 # Analyze company
                 analysis = analyzer.analyze_company(company, people_data)
@@ -1023,7 +1772,7 @@ async def analyze_companies(request: CompanyAnalysisRequest):
                     ))
                     
             except Exception as e:
-                logger.error(f"Error analyzing company {company}: {e}")
+                logger.error("Error analyzing company %s: %s", company, e)
                 continue
         
         # Get skip report
@@ -1048,11 +1797,11 @@ async def analyze_companies(request: CompanyAnalysisRequest):
             "success_rate": round(len(target_companies) / max(total_analyzed, 1) * 100, 1)
         }
         
-        return CompanyAnalysisResponse(
+        return CompanyAnalysisResponse.model_construct(
             target_companies=target_companies,
             skipped_companies=skipped_companies,
             summary=summary,
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
@@ -1064,10 +1813,10 @@ async def get_raw_jobspy_results(request: JobSearchRequest):
     """Get raw JobSpy results without any processing - fastest response"""
     try:
         # Parse query quickly
-        search_params = job_scraper.parse_query(request.query)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
         
         # Get all available jobs - increased to allow more jobs from location variants
-        jobs = job_scraper.search_jobs(search_params, max_results=500)
+        jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=500)
         
         if not jobs:
             raise HTTPException(status_code=404, detail="No jobs found matching criteria")
@@ -1084,7 +1833,7 @@ async def get_raw_jobspy_results(request: JobSearchRequest):
             total_jobs=len(jobs),
             search_query=request.query,
             location=search_params.get("location", "N/A"),
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
@@ -1096,10 +1845,10 @@ async def search_jobs_fast(request: JobSearchRequest):
     """Fast job search with immediate results - optimized for 30-second responses"""
     try:
         # Parse query quickly
-        search_params = job_scraper.parse_query(request.query)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
         
         # Get all available jobs
-        jobs = job_scraper.search_jobs(search_params, max_results=20)
+        jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=20)
         
         if not jobs:
             raise HTTPException(status_code=404, detail="No jobs found matching criteria")
@@ -1124,18 +1873,18 @@ async def search_jobs_fast(request: JobSearchRequest):
                 "contacts_found": 0,
                 "top_contacts": [],
                 "recommendation": "PENDING - RapidAPI analysis required",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
             
             companies_analyzed.append(company_analysis)
             processed_count += 1
             
-        return JobSearchResponse(
+        return JobSearchResponse.model_construct(
             companies_analyzed=companies_analyzed,
             jobs_found=len(jobs),
             total_processed=processed_count,
             search_query=request.query,
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
@@ -1145,221 +1894,176 @@ async def search_jobs_fast(request: JobSearchRequest):
 @app.post("/search-jobs-stream")
 async def search_jobs_stream(request: JobSearchRequest):
     """Stream job search results for immediate feedback"""
-    def generate_stream():
+    async def generate_stream():
         try:
             # Initialize leads list
             leads = []
             
             # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Starting job search...', 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield sse_event('status', message='Starting job search...')
             
             # Parse query and send update
-            search_params = job_scraper.parse_query(request.query)
+            search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
             search_term = search_params.get("search_term", request.query)
-            yield f"data: {json.dumps({'type': 'status', 'message': f'Searching for: {search_term}', 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield sse_event('status', message=f'Searching for: {search_term}')
             
             # Search jobs - get all available jobs (increased from 50 to 500)
-            jobs = job_scraper.search_jobs(search_params, max_results=500)
-            yield f"data: {json.dumps({'type': 'jobs_found', 'count': len(jobs), 'timestamp': datetime.now().isoformat()})}\n\n"
+            jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=500)
+            yield sse_event('jobs_found', count=len(jobs))
             
             if not jobs:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'No jobs found matching criteria', 'timestamp': datetime.now().isoformat()})}\n\n"
+                yield sse_event('error', message='No jobs found matching criteria')
                 return
             
-            companies_analyzed = []
             processed_count = 0
+            total_found = len(jobs)
             
-            # Rate limiting: Process jobs in batches to respect 20 req/min limit
-            # For streaming, process max 4 jobs per batch (balanced for real-time updates)
-            max_jobs_per_batch = 4
-            total_jobs = len(jobs)
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': f'Processing {total_jobs} jobs in batches of {max_jobs_per_batch}', 'timestamp': datetime.now().isoformat()})}\n\n"
-            
-            # Track companies we've already analyzed to avoid duplicate RapidAPI calls
-            analyzed_companies = {}
+            # One job per company - later postings would only repeat the same contacts
+            jobs = list(first_job_per_company(jobs).values())
             
-            # Process jobs in batches
-            for batch_start in range(0, total_jobs, max_jobs_per_batch):
-                batch_end = min(batch_start + max_jobs_per_batch, total_jobs)
-                batch_jobs = jobs[batch_start:batch_end]
-                
-                batch_msg = f'Processing batch {batch_start//max_jobs_per_batch + 1}: jobs {batch_start+1}-{batch_end}'
-                yield f"data: {json.dumps({'type': 'status', 'message': batch_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                
-                # Process jobs in current batch
-                for i, job in enumerate(batch_jobs):
-                    global_job_index = batch_start + i
-                    company = job.get('company', '')
-                    company_msg = f'Analyzing company {global_job_index+1}/{total_jobs}: {company}'
-                    yield f"data: {json.dumps({'type': 'processing', 'message': company_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                    
-                    # Check if already processed
-                    job_fingerprint = memory_manager.create_job_fingerprint(job)
-                    if memory_manager.is_job_processed(job_fingerprint):
-                        skip_msg = f'Already processed: {company}'
-                        yield f"data: {json.dumps({'type': 'skipped', 'message': skip_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                        continue
-                    
-                    # Check if we've already analyzed this company in this session
-                    if company in analyzed_companies:
-                        company_analysis = analyzed_companies[company]
-                        has_ta_team = company_analysis['has_ta_team']
-                        company_found = company_analysis['company_found']
-                        contacts = company_analysis.get('contacts', [])
-                        
-                        if has_ta_team:
-                            ta_msg = f'Skipping {company}: Has internal TA team (cached)'
-                            yield f"data: {json.dumps({'type': 'skipped', 'message': ta_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                            memory_manager.mark_job_processed(job_fingerprint)
-                            continue
-                        
-                        if not company_found:
-                            contact_msg = f'Company profile not found for {company} (cached)'
-                            yield f"data: {json.dumps({'type': 'skipped', 'message': contact_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                            memory_manager.mark_job_processed(job_fingerprint)
-                            continue
-                        
-                        if not contacts:
-                            contact_msg = f'No contacts found for {company} (cached)'
-                            yield f"data: {json.dumps({'type': 'skipped', 'message': contact_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                            memory_manager.mark_job_processed(job_fingerprint)
-                            continue
-                        
-                        # Process cached contacts
-                        for contact in contacts[:3]:
-                            email = contact_finder.find_email(contact['title'], company)
-                            if email and not memory_manager.is_email_contacted(email):
-                                message = ""
-                                if request.auto_generate_messages:
-                                    message = email_generator.generate_outreach(
-                                        job_title=job.get('title', ''),
-                                        company=company,
-                                        contact_title=contact['title'],
-                                        job_url=job.get('job_url', '')
-                                    )
-                                
-                                score = contact_finder.calculate_lead_score(contact, job, has_ta_team)
-                                lead = {
-                                    "name": contact['full_name'],
-                                    "title": contact['title'],
-                                    "company": company,
-                                    "email": email,
-                                    "job_title": job.get('title', ''),
-                                    "job_url": job.get('job_url', ''),
-                                    "message": message,
-                                    "score": score,
-                                    "timestamp": datetime.now().isoformat()
-                                }
-                                yield f"data: {json.dumps({'type': 'lead', 'data': lead, 'timestamp': datetime.now().isoformat()})}\n\n"
-                                leads.append(lead)
-                        
-                        memory_manager.mark_job_processed(job_fingerprint)
-                        processed_count += 1
-                        continue
-                    
-                    # Find contacts
-                    role_hint = job.get('title', '')
-                    keywords = [role_hint] + search_params.get('keywords', [])
-                    contacts, has_ta_team, employee_roles, company_found = contact_finder.find_contacts(
-                        company=company,
-                        role_hint=role_hint,
-                        keywords=keywords,
-                        company_website=job.get('linkedin_company_url')
+            # Process max 4 jobs per batch (balanced for real-time updates);
+            # RapidAPI pacing comes from rate_limiter inside analyze_company_contacts
+            max_jobs_per_batch = 4
+            total_jobs = len(jobs)
+            
+            yield sse_event('status', message=f'Processing {total_jobs} companies in batches of {max_jobs_per_batch}')
+            
+            # Workers push frames here and this generator is the single writer to the response;
+            # the bound makes workers wait on a slow client instead of buffering without limit
+            events: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+            
+            async def process_job(job: Dict[str, Any]):
+                """Analyze one job's company, queueing its SSE frames as they are produced"""
+                nonlocal processed_count
+                company = job.get('company', '')
+                company_key = normalize_company(company)
+                
+                # Check if already processed
+                job_fingerprint = memory_manager.create_job_fingerprint(job)
+                if memory_manager.is_job_processed(job_fingerprint):
+                    await events.put(sse_event('skipped', message=f'Already processed: {company}'))
+                    return
+                
+                # Reuse the analysis if this company was seen recently
+                company_analysis = _COMPANY_ANALYSIS_CACHE.get(company_key)
+                cached = company_analysis is not None
+                job_title = job.get('title', '')
+                job_url = job.get('job_url', '')
+                if not cached:
+                    company_analysis = await analyze_company_contacts(
+                        company,
+                        job_title,
+                        [job_title] + search_params.get('keywords', []),
+                        job.get('linkedin_company_url')
                     )
-                    
-                    # Cache the company analysis results
-                    analyzed_companies[company] = {
-                        'has_ta_team': has_ta_team,
-                        'company_found': company_found,
-                        'contacts': contacts,
-                        'employee_roles': employee_roles
-                    }
-                    
-                    if has_ta_team:
-                        ta_msg = f'Skipping {company}: Has internal TA team'
-                        yield f"data: {json.dumps({'type': 'skipped', 'message': ta_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                        memory_manager.mark_job_processed(job_fingerprint)
-                        continue
-                    
-                    if not company_found:
-                        contact_msg = f'Company profile not found for {company}'
-                        yield f"data: {json.dumps({'type': 'skipped', 'message': contact_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                        memory_manager.mark_job_processed(job_fingerprint)
-                        continue
-                    
-                    if not contacts:
-                        contact_msg = f'No contacts found for {company}'
-                        yield f"data: {json.dumps({'type': 'skipped', 'message': contact_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                        memory_manager.mark_job_processed(job_fingerprint)
-                        continue
-                    
-                    # Process each contact
-                    for contact in contacts[:3]:  # Top 3 contacts per company
-                        # Find email via Hunter.io
-                        email = contact_finder.find_email(contact['title'], company)
+                suffix = ' (cached)' if cached else ''
+                
+                has_ta_team = company_analysis['has_ta_team']
+                contacts = company_analysis['contacts']
+                
+                skip_msg = None
+                if has_ta_team:
+                    skip_msg = f'Skipping {company}: Has internal TA team{suffix}'
+                elif not company_analysis['company_found']:
+                    skip_msg = f'Company profile not found for {company}{suffix}'
+                elif not contacts:
+                    skip_msg = f'No contacts found for {company}{suffix}'
+                if skip_msg:
+                    memory_manager.mark_job_processed(job_fingerprint)
+                    await events.put(sse_event('skipped', message=skip_msg))
+                    return
+                
+                # Find emails via Hunter.io for the top 3 contacts per company
+                for contact, email in await find_contact_emails(contacts[:3], company):
+                    # Only count as lead if email is found and not already contacted
+                    if email and not memory_manager.is_email_contacted(email):
+                        contact_title = contact['title']
                         
-                        # Only count as lead if email is found and not already contacted
-                        if email and not memory_manager.is_email_contacted(email):
-                            # Generate message if requested
-                            message = ""
-                            if request.auto_generate_messages:
-                                message = email_generator.generate_outreach(
-                                    job_title=job.get('title', ''),
-                                    company=company,
-                                    contact_title=contact['title'],
-                                    job_url=job.get('job_url', '')
-                                )
-                            
-                            # Calculate score and create lead
-                            score = contact_finder.calculate_lead_score(contact, job, has_ta_team)
-                            
-                            lead = {
-                                "name": contact['full_name'],
-                                "title": contact['title'],
-                                "company": company,
-                                "email": email,
-                                "job_title": job.get('title', ''),
-                                "job_url": job.get('job_url', ''),
-                                "message": message,
-                                "score": score,
-                                "timestamp": datetime.now().isoformat()
-                            }
-                            
-                            # Stream the lead immediately
-                            yield f"data: {json.dumps({'type': 'lead', 'data': lead, 'timestamp': datetime.now().isoformat()})}\n\n"
-                            leads.append(lead)
+                        # Generate message in the background if requested (poll /lead/{lead_id}/message);
+                        # a task rather than BackgroundTasks so it's ready while the stream is still open
+                        lead_id = uuid.uuid4().hex
+                        if request.auto_generate_messages:
+                            message_task = asyncio.create_task(generate_and_store_message(
+                                lead_id,
+                                job_title,
+                                company,
+                                contact_title,
+                                job_url
+                            ))
+                            _MESSAGE_TASKS.add(message_task)
+                            message_task.add_done_callback(_MESSAGE_TASKS.discard)
                         
-
+                        # Calculate score and create lead
+                        score = contact_finder.calculate_lead_score(contact, job, has_ta_team)
+                        
+                        lead = {
+                            "lead_id": lead_id,
+                            "name": contact['full_name'],
+                            "title": contact_title,
+                            "company": company,
+                            "email": email,
+                            "job_title": job_title,
+                            "job_url": job_url,
+                            "message": "",
+                            "score": score,
+                            "timestamp": _now_iso()
+                        }
+                        leads.append(lead)
+                        await events.put(sse_event('lead', data=lead))
                 
                 # Mark job as processed
                 memory_manager.mark_job_processed(job_fingerprint)
                 processed_count += 1
-                
-
             
-            # Wait between batches to respect rate limits
-            if batch_end < total_jobs:
-                wait_msg = f'Batch complete. Waiting 60 seconds before next batch...'
-                yield f"data: {json.dumps({'type': 'status', 'message': wait_msg, 'timestamp': datetime.now().isoformat()})}\n\n"
-                time.sleep(60)
+            async def produce():
+                """Run the batches and queue their frames, ending with None once the summary is queued"""
+                try:
+                    for batch_start in range(0, total_jobs, max_jobs_per_batch):
+                        batch_end = min(batch_start + max_jobs_per_batch, total_jobs)
+                        batch_jobs = jobs[batch_start:batch_end]
+                        
+                        batch_msg = f'Processing batch {batch_start//max_jobs_per_batch + 1}: jobs {batch_start+1}-{batch_end}'
+                        await events.put(sse_event('status', message=batch_msg))
+                        
+                        for i, job in enumerate(batch_jobs):
+                            company_msg = f'Analyzing company {batch_start + i + 1}/{total_jobs}: {job.get("company", "")}'
+                            await events.put(sse_event('processing', message=company_msg))
+                        
+                        # Run the batch's jobs concurrently; each queues its results as it goes
+                        await asyncio.gather(*(process_job(job) for job in batch_jobs))
+                    
+                    # Send completion summary
+                    await events.put(sse_event('complete', summary={'leads_found': len(leads), 'jobs_processed': processed_count, 'total_jobs': total_found}))
+                except Exception as e:
+                    logger.error(f"Error in streaming job search: {e}")
+                    await events.put(sse_event('error', message=str(e)))
+                await events.put(None)
             
-            # Send completion summary
-            yield f"data: {json.dumps({'type': 'complete', 'summary': {'leads_found': len(leads), 'jobs_processed': processed_count, 'total_jobs': len(jobs)}, 'timestamp': datetime.now().isoformat()})}\n\n"
+            producer = asyncio.create_task(produce())
+            try:
+                while (frame := await events.get()) is not None:
+                    yield frame
+            finally:
+                # Stop the workers if the client disconnects mid-stream
+                producer.cancel()
             
         except Exception as e:
             logger.error(f"Error in streaming job search: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e), 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield sse_event('error', message=str(e))
     
-    return StreamingResponse(generate_stream(), media_type="text/plain")
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/analyze-contract-opportunities", response_model=ContractAnalysisResponse)
 async def analyze_contract_opportunities(request: ContractOpportunityRequest):
     """Analyze job market to identify high-value recruiting contract opportunities"""
     try:
         # Parse query and search for jobs
-        search_params = job_scraper.parse_query(request.query)
-        jobs = job_scraper.search_jobs(search_params, max_results=request.max_companies * 5)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
+        jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=request.max_companies * 5)
         
         if not jobs:
             raise HTTPException(status_code=404, detail="No jobs found matching criteria")
@@ -1387,105 +2091,119 @@ async def create_instantly_campaign(request: InstantlyCampaignRequest):
     """Create an Instantly.ai campaign with leads (without sending emails)"""
     try:
         # Parse query and search for jobs
-        search_params = job_scraper.parse_query(request.query)
-        jobs = job_scraper.search_jobs(search_params, max_results=request.max_leads * 3)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
+        jobs = await cached_job_search(job_scraper.search_jobs, search_params=search_params, max_results=request.max_leads * 3)
         
         if not jobs:
             raise HTTPException(status_code=404, detail="No jobs found matching criteria")
         
-        leads = []
-        processed_companies = set()
+        company_semaphore = asyncio.Semaphore(COMPANY_CONCURRENCY)
         
-        # Process jobs to find leads
-        for job in jobs:
-            if len(leads) >= request.max_leads:
-                break
-                
+        async def find_company_leads(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+            """Find contacts and Hunter.io emails for one job's company and build its leads"""
             company = job.get('company', '')
-            if company in processed_companies:
-                continue
-                
-            processed_companies.add(company)
-            
-            # Find contacts and analyze company
-            try:
-                description = job.get('description') or job.get('job_level') or ''
-                result = contact_finder.find_contacts(
-                    company=company,
-                    role_hint=job.get('title', ''),
-                    keywords=job_scraper.extract_keywords(description),
-                    company_website=job.get('company_website')
-                )
-                
-                contacts, has_ta_team, employee_roles, company_found = result
-                
-                # Skip companies with TA teams
-                if has_ta_team:
-                    continue
-                
-                # Get Hunter.io emails
-                hunter_emails = []
-                if not has_ta_team and company_found and job.get('company_website'):  # Only if no TA team AND company found AND domain found
-                    try:
-                        hunter_emails = contact_finder.find_hunter_emails_for_target_company(
-                            company=company,
-                            job_title=job.get('title', ''),
-                            employee_roles=employee_roles,
-                            company_website=job.get('company_website'),
-                            rapidapi_contacts=contacts  # Pass RapidAPI contacts for better results
-                        )
-                        # Log success only if emails were actually found
-                        if hunter_emails:
-                            logger.info(f"✅ Found {len(hunter_emails)} Hunter.io emails for {company}")
-                        else:
-                            logger.warning(f"⚠️  No Hunter.io emails found for {company}")
-                    except Exception as e:
-                        logger.error(f"Hunter.io error for {company}: {e}")
-                elif has_ta_team:
-                    logger.info(f"⏭️  Skipping Hunter.io for {company} - has TA team")
-                elif not company_found:
-                    logger.info(f"⏭️  Skipping Hunter.io for {company} - company not found")
-                elif not job.get('company_website'):
-                    logger.info(f"⏭️  Skipping Hunter.io for {company} - no domain found")
-                
-                # Create leads from contacts and emails
-                for contact in contacts[:3]:  # Top 3 contacts
-                    email = contact_finder.find_email(contact.get('title', ''), company)
-                    if email:
-                        score = contact_finder.calculate_lead_score(contact, job, has_ta_team)
-                        if score >= request.min_score:
-                            lead = {
-                                "name": contact.get('name', ''),
-                                "title": contact.get('title', ''),
+            job_title = job.get('title', '')
+            job_url = job.get('job_url', '')
+            company_website = job.get('company_website') or ''
+            company_leads = []
+            async with company_semaphore:
+                try:
+                    description = job.get('description') or job.get('job_level') or ''
+                    analysis = await analyze_company_contacts(
+                        company,
+                        job_title,
+                        job_scraper.extract_keywords(description),
+                        company_website or None
+                    )
+                    contacts = analysis['contacts']
+                    has_ta_team = analysis['has_ta_team']
+                    employee_roles = analysis['employee_roles']
+                    company_found = analysis['company_found']
+                    
+                    # Skip companies with TA teams
+                    if has_ta_team:
+                        return company_leads
+                    
+                    # Get Hunter.io emails
+                    hunter_emails = []
+                    if company_found and company_website:  # Only if company found AND domain found
+                        try:
+                            hunter_emails = await find_hunter_emails(
+                                company,
+                                job_title,
+                                employee_roles,
+                                company_website
+                            )
+                            # Log success only if emails were actually found
+                            if hunter_emails:
+                                logger.info("✅ Found %s Hunter.io emails for %s", len(hunter_emails), company)
+                            else:
+                                logger.warning("⚠️  No Hunter.io emails found for %s", company)
+                        except Exception as e:
+                            logger.error("Hunter.io error for %s: %s", company, e)
+                    elif not company_found:
+                        logger.info("⏭️  Skipping Hunter.io for %s - company not found", company)
+                    else:
+                        logger.info("⏭️  Skipping Hunter.io for %s - no domain found", company)
+                    
+                    # Create leads from contacts and emails
+                    for contact, email in await find_contact_emails(contacts[:3], company):  # Top 3 contacts
+                        if email:
+                            score = contact_finder.calculate_lead_score(contact, job, has_ta_team)
+                            if score >= request.min_score:
+                                company_leads.append({
+                                    "name": contact.get('name', ''),
+                                    "title": contact.get('title', ''),
+                                    "company": company,
+                                    "email": email,
+                                    "job_title": job_title,
+                                    "job_url": job_url,
+                                    "score": score,
+                                    "hunter_emails": hunter_emails,
+                                    "company_website": company_website
+                                })
+                    
+                    # Add Hunter.io emails as leads if no contacts found
+                    if not contacts and hunter_emails:
+                        for email in hunter_emails[:2]:  # Top 2 emails
+                            company_leads.append({
+                                "name": "Hiring Manager",
+                                "title": "Hiring Manager",
                                 "company": company,
                                 "email": email,
-                                "job_title": job.get('title', ''),
-                                "job_url": job.get('job_url', ''),
-                                "score": score,
+                                "job_title": job_title,
+                                "job_url": job_url,
+                                "score": 0.7,  # Default score for Hunter.io emails
                                 "hunter_emails": hunter_emails,
-                                "company_website": job.get('company_website', '')
-                            }
-                            leads.append(lead)
+                                "company_website": company_website
+                            })
                 
-                # Add Hunter.io emails as leads if no contacts found
-                if not contacts and hunter_emails:
-                    for email in hunter_emails[:2]:  # Top 2 emails
-                        lead = {
-                            "name": "Hiring Manager",
-                            "title": "Hiring Manager",
-                            "company": company,
-                            "email": email,
-                            "job_title": job.get('title', ''),
-                            "job_url": job.get('job_url', ''),
-                            "score": 0.7,  # Default score for Hunter.io emails
-                            "hunter_emails": hunter_emails,
-                            "company_website": job.get('company_website', '')
-                        }
-                        leads.append(lead)
-                        
-            except Exception as e:
-                logger.error(f"Error processing {company}: {e}")
-                continue
+                except Exception as e:
+                    logger.error("Error processing %s: %s", company, e)
+            return company_leads
+        
+        # Process companies concurrently, one wave at a time so we stop once enough leads are found
+        leads = []
+        # Companies already known to have a TA team would be dropped after find_contacts anyway
+        targets = []
+        skipped_ta_team = 0
+        for company_key, job in first_job_per_company(jobs).items():
+            analysis = _COMPANY_ANALYSIS_CACHE.get(company_key)
+            if analysis is not None and analysis['has_ta_team']:
+                skipped_ta_team += 1
+            else:
+                targets.append(job)
+        if skipped_ta_team:
+            logger.info("⏭️  Skipping %s companies with a known TA team", skipped_ta_team)
+        
+        for wave_start in range(0, len(targets), COMPANY_CONCURRENCY):
+            if len(leads) >= request.max_leads:
+                break
+            wave = targets[wave_start:wave_start + COMPANY_CONCURRENCY]
+            for company_leads in await asyncio.gather(*(find_company_leads(job) for job in wave)):
+                if len(leads) >= request.max_leads:
+                    break
+                leads.extend(company_leads)
         
         # Create Instantly campaign
         campaign_id = None
@@ -1506,7 +2224,7 @@ async def create_instantly_campaign(request: InstantlyCampaignRequest):
             leads_added=len(leads),
             total_leads_found=len(leads),
             status=status,
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
@@ -1523,13 +2241,16 @@ async def get_company_jobs(request: CompanyJobsRequest):
             company=request.company_name,
             total_jobs=len(jobs),
             jobs=jobs,
-            timestamp=datetime.now().isoformat()
+            timestamp=_now_iso()
         )
         
     except Exception as e:
         logger.error(f"Error fetching company jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Rows per company_analysis insert when storing webhook results
+WEBHOOK_INSERT_BATCH_SIZE = 500
+
 @app.post("/webhook/results")
 async def receive_webhook_results(request: WebhookRequest):
     """Receive processing results from the pipeline"""
@@ -1546,24 +2267,17 @@ async def receive_webhook_results(request: WebhookRequest):
                     "timestamp": request.timestamp,
                     "status": "completed"
                 }
-                supabase.table("batches").insert(batch_data).execute()
+                await run_in_pool(API_POOL, supabase.table("batches").insert(batch_data, returning="minimal").execute)
                 
-                # Store individual results
-                for result in request.results:
-                    result_data = {
-                        "batch_id": request.batch_id,
-                        "company": result.company,
-                        "job_title": result.job_title,
-                        "job_url": result.job_url,
-                        "has_ta_team": result.has_ta_team,
-                        "contacts_found": result.contacts_found,
-                        "top_contacts": result.top_contacts,
-                        "recommendation": result.recommendation,
-                        "hunter_emails": result.hunter_emails,
-                        "instantly_campaign_id": result.instantly_campaign_id,
-                        "timestamp": result.timestamp
-                    }
-                    supabase.table("company_analysis").insert(result_data).execute()
+                # Store individual results in bulk, chunked to keep PostgREST payloads small
+                # (every WebhookResult field is a company_analysis column)
+                rows = [
+                    {"batch_id": request.batch_id, **result.model_dump()}
+                    for result in request.results
+                ]
+                for start in range(0, len(rows), WEBHOOK_INSERT_BATCH_SIZE):
+                    chunk = rows[start:start + WEBHOOK_INSERT_BATCH_SIZE]
+                    await run_in_pool(API_POOL, supabase.table("company_analysis").insert(chunk, returning="minimal").execute)
                 
                 logger.info(f"✅ Stored {len(request.results)} results in Supabase for batch {request.batch_id}")
                 
@@ -1574,7 +2288,7 @@ async def receive_webhook_results(request: WebhookRequest):
         
         # Log results
         for result in request.results:
-            logger.info(f"Company: {result.company}, TA Team: {result.has_ta_team}, Recommendation: {result.recommendation}")
+            logger.info("Company: %s, TA Team: %s, Recommendation: %s", result.company, result.has_ta_team, result.recommendation)
         
         return {"status": "success", "batch_id": request.batch_id}
         
@@ -1598,10 +2312,13 @@ async def process_jobs_background(request: JobSearchRequest, current_user: Dict
         logger.info(f"🔍 Current user: {current_user}")
         
         # Generate batch ID
-        batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        started = datetime.now()
+        batch_id = f"batch_{started.strftime('%Y%m%d_%H%M%S')}"
+        created_at = started.isoformat()
         
         # Mark search as active in memory
-        active_searches[batch_id] = False  # False = not cancelled
+        running_searches.add(batch_id)
+        cancel_events[batch_id] = asyncio.Event()
         
         # Save agent to Supabase for persistence
         logger.info(f"🔍 About to create agent data for batch_id: {batch_id}")
@@ -1612,9 +2329,9 @@ async def process_jobs_background(request: JobSearchRequest, current_user: Dict
                 "user_email": current_user["email"],
                 "query": request.query,
                 "status": "created",
-                "start_time": datetime.now().isoformat(),
-                "created_at": datetime.now().isoformat(),  # Ensure created_at is set
-                "total_cities": 55,
+                "start_time": created_at,
+                "created_at": created_at,  # Ensure created_at is set
+                "total_cities": len(request.cities or US_CITIES),
                 "processed_cities": 0,
                 "processed_companies": 0,
                 "total_jobs_found": 0,
@@ -1654,9 +2371,6 @@ async def process_jobs_background(request: JobSearchRequest, current_user: Dict
             logger.error(f"❌ Error saving agent to Supabase: {e}")
             # Continue processing even if Supabase save fails
         
-        # Parse query for background processing
-        search_params = job_scraper.parse_query(request.query)
-        
         # Process jobs in background (async) - will search jobs per city
         # Add a small delay to ensure agent record is created first
         asyncio.create_task(process_jobs_background_task(batch_id, [], request))
@@ -1678,17 +2392,16 @@ async def cancel_search(batch_id: str):
     """Cancel an active search by batch_id"""
     try:
         # First try to cancel in-memory search
-        if batch_id in active_searches:
-            active_searches[batch_id] = True
+        if request_cancel(batch_id):
             logger.info(f"🚫 Search {batch_id} marked for cancellation in memory")
         
         # Also update the agent status in database
         if supabase:
             try:
-                supabase.table("agents").update({
+                await update_agent(batch_id, {
                     "status": "cancelled",
                     "end_time": datetime.now().isoformat()
-                }).eq("batch_id", batch_id).execute()
+                })
                 logger.info(f"✅ Agent {batch_id} status updated to cancelled in database")
             except Exception as db_error:
                 logger.warning(f"Could not update agent status in database: {db_error}")
@@ -1711,17 +2424,15 @@ async def delete_agent(batch_id: str, current_user: Dict = Depends(get_current_u
             raise HTTPException(status_code=503, detail="Supabase not configured")
         
         # First check if agent exists and belongs to user
-        agent_response = supabase.table("agents").select("*").eq("batch_id", batch_id).eq("user_id", current_user["user_id"]).execute()
+        agent_response = supabase.table("agents").select("batch_id").eq("batch_id", batch_id).eq("user_id", current_user["user_id"]).execute()
         
         if not agent_response.data:
             raise HTTPException(status_code=404, detail="Agent not found or access denied")
         
-        agent = agent_response.data[0]
         logger.info(f"🗑️ Deleting agent {batch_id} for user {current_user['user_id']}")
         
         # Cancel if still running
-        if batch_id in active_searches:
-            active_searches[batch_id] = True
+        if request_cancel(batch_id):
             logger.info(f"🚫 Cancelled running agent {batch_id}")
         
         # Delete from database
@@ -1756,18 +2467,18 @@ async def delete_agent(batch_id: str, current_user: Dict = Depends(get_current_u
 async def get_search_status(batch_id: str):
     """Get the status of a search by batch_id"""
     try:
-        if batch_id not in active_searches:
+        is_cancelled = batch_id in cancelled_searches
+        if not is_cancelled and batch_id not in running_searches:
             raise HTTPException(status_code=404, detail="Search not found")
         
-        is_cancelled = active_searches[batch_id]
-        status = "cancelled" if is_cancelled else "active"
-        
         return {
             "batch_id": batch_id,
-            "status": status,
+            "status": "cancelled" if is_cancelled else "active",
             "is_cancelled": is_cancelled
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting search status for {batch_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1776,20 +2487,23 @@ async def get_search_status(batch_id: str):
 async def get_active_searches():
     """Get all active searches from memory"""
     try:
-        active = {batch_id: not cancelled for batch_id, cancelled in active_searches.items() if not cancelled}
-        cancelled = {batch_id: cancelled for batch_id, cancelled in active_searches.items() if cancelled}
-        
         return {
-            "active_searches": list(active.keys()),
-            "cancelled_searches": list(cancelled.keys()),
-            "total_active": len(active),
-            "total_cancelled": len(cancelled)
+            "active_searches": list(running_searches),
+            "cancelled_searches": list(cancelled_searches),
+            "total_active": len(running_searches),
+            "total_cancelled": len(cancelled_searches)
         }
         
     except Exception as e:
         logger.error(f"Error getting active searches: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Columns the /agents listing returns
+AGENT_LIST_COLUMNS = (
+    "batch_id,user_id,user_email,query,status,start_time,end_time,created_at,total_cities,"
+    "processed_cities,processed_companies,total_jobs_found,hours_old,create_campaigns"
+)
+
 @app.get("/agents")
 async def get_agents(current_user: Dict = Depends(get_current_user)):
     """Get all agents from Supabase"""
@@ -1800,36 +2514,12 @@ async def get_agents(current_user: Dict = Depends(get_current_user)):
             logger.error("Supabase client not initialized")
             raise HTTPException(status_code=500, detail="Database not available")
         
-        # Get all agents from agents table
-        logger.info(f"Querying agents table for user_id: {current_user['user_id']}")
+        # Get this user's agents - use created_at for ordering since start_time might be null
         try:
-            # First, let's see what agents exist for this user
-            logger.info(f"🔍 Querying all agents from table...")
-            all_agents = supabase.table("agents").select("*").execute()
-            logger.info(f"All agents in table: {all_agents.data}")
-            logger.info(f"Total agents found: {len(all_agents.data) if all_agents.data else 0}")
-            
-            # Now filter by user_id - use created_at for ordering since start_time might be null
-            logger.info(f"🔍 Filtering by user_id: {current_user['user_id']}")
-            result = supabase.table("agents").select("*").eq("user_id", current_user["user_id"]).order("created_at", desc=True).limit(50).execute()
-            logger.info(f"Query result for user {current_user['user_id']}: {result.data}")
-            logger.info(f"Filtered agents found: {len(result.data) if result.data else 0}")
-            
-            # Check if there are any agents at all
-            if all_agents.data and len(all_agents.data) > 0:
-                logger.info(f"🔍 Sample agent data: {all_agents.data[0] if all_agents.data else 'No data'}")
-                # Check what user_ids exist
-                user_ids = [agent.get('user_id') for agent in all_agents.data if agent.get('user_id')]
-                logger.info(f"🔍 User IDs in table: {user_ids}")
-            else:
-                logger.warning("🔍 No agents found in table at all")
-            
-            # Also check if there are any agents with the batch_id we just created
-            if 'batch_20250801_125402' in str(all_agents.data):
-                logger.info("Found the batch_id in the table!")
-            else:
-                logger.warning("The batch_id was not found in the table")
-                
+            result = await run_in_pool(
+                API_POOL,
+                supabase.table("agents").select(AGENT_LIST_COLUMNS).eq("user_id", current_user["user_id"]).order("created_at", desc=True).limit(50).execute
+            )
         except Exception as table_error:
             logger.warning(f"Agents table may not exist yet: {table_error}")
             # Return empty result if table doesn't exist
@@ -1870,6 +2560,22 @@ async def get_agents(current_user: Dict = Depends(get_current_user)):
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def update_agent(batch_id: str, fields: Dict[str, Any]):
+    """Update an agent row on API_POOL so the PostgREST round trip doesn't block the event loop"""
+    await run_in_pool(API_POOL, supabase.table("agents").update(fields).eq("batch_id", batch_id).execute)
+
+async def increment_agent_counter(batch_id: str, field: str, delta: int = 1):
+    """Atomically add delta to one of an agent's progress counters (see increment_agent_counter.sql)"""
+    if not supabase:
+        return
+    try:
+        await run_in_pool(
+            API_POOL,
+            supabase.rpc("inc_agent", {"p_batch": batch_id, "p_field": field, "p_delta": delta}).execute
+        )
+    except Exception as e:
+        logger.error(f"❌ Error updating {field}: {e}")
+
 async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request: JobSearchRequest):
     """Background task to process jobs with city-by-city flow: City → Companies → Contacts → Next City"""
     try:
@@ -1880,6 +2586,9 @@ async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request:
         
         # Initialize batch leads collection for single campaign per agent
         batch_leads = []
+        company_semaphore = asyncio.Semaphore(COMPANY_CONCURRENCY)
+        # Set by request_cancel(); checked between steps and raced against in-flight city work
+        cancel_event = cancel_events.setdefault(batch_id, asyncio.Event())
         
         # Initialize tracker for this batch
         tracker = CompanyProcessingTracker(batch_id)
@@ -1889,330 +2598,283 @@ async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request:
         
         # Update agent status to "processing"
         try:
-            supabase.table("agents").update({
+            await update_agent(batch_id, {
                 "status": "processing",
                 "start_time": datetime.now().isoformat()
-            }).eq("batch_id", batch_id).execute()
+            })
         except Exception as e:
             logger.error(f"❌ Error updating agent status: {e}")
         
         # Get search parameters for city-by-city processing
-        search_params = job_scraper.parse_query(request.query)
+        search_params = await run_in_pool(LLM_POOL, job_scraper.parse_query, request.query)
         await log_to_supabase(batch_id, f"📋 Parsed search parameters: {search_params}", "info")
         
-        # Define cities to process (all 55 major US cities)
-        cities_to_process = [
-            "New York, NY", "Los Angeles, CA", "Chicago, IL", "Houston, TX", "Phoenix, AZ",
-            "Philadelphia, PA", "San Antonio, TX", "San Diego, CA", "Dallas, TX", "San Jose, CA",
-            "Austin, TX", "Jacksonville, FL", "Fort Worth, TX", "Columbus, OH", "Charlotte, NC",
-            "San Francisco, CA", "Indianapolis, IN", "Seattle, WA", "Denver, CO", "Washington, DC",
-            "Boston, MA", "El Paso, TX", "Nashville, TN", "Detroit, MI", "Oklahoma City, OK",
-            "Portland, OR", "Las Vegas, NV", "Memphis, TN", "Louisville, KY", "Baltimore, MD",
-            "Milwaukee, WI", "Albuquerque, NM", "Tucson, AZ", "Fresno, CA", "Sacramento, CA",
-            "Mesa, AZ", "Kansas City, MO", "Atlanta, GA", "Long Beach, CA", "Colorado Springs, CO",
-            "Raleigh, NC", "Miami, FL", "Virginia Beach, VA", "Omaha, NE", "Oakland, CA",
-            "Minneapolis, MN", "Tampa, FL", "Tulsa, OK", "Arlington, TX", "New Orleans, LA",
-            "Wichita, KS", "Cleveland, OH", "Bakersfield, CA", "Aurora, CO", "Anaheim, CA"
-        ]
-        await log_to_supabase(batch_id, f"🏙️ Will process {len(cities_to_process)} cities: {', '.join(cities_to_process)}", "info")
+        # Define cities to process (all 55 major US cities unless the request names its own)
+        cities_to_process = request.cities or US_CITIES
+        # JobSpy arguments are the same for every city - only the location changes
+        base_kwargs = {
+            "search_term": search_params.get("search_term", request.query),
+            "hours_old": request.hours_old,
+            "job_type": search_params.get("job_type", "fulltime"),
+            "is_remote": search_params.get("is_remote", True),
+            "site_name": search_params.get("site_name", ["indeed", "linkedin", "zip_recruiter", "google", "glassdoor"]),
+            "results_wanted": 50,  # Limit per city for faster processing
+            "offset": 0,
+            "distance": 25,
+            "easy_apply": False,
+            "country_indeed": "us",
+            "google_search_term": "",
+            "linkedin_fetch_description": True,
+            "verbose": False
+        }
+        total_cities = len(cities_to_process)
+        await log_to_supabase(batch_id, f"🏙️ Will process {total_cities} cities: {', '.join(cities_to_process)}", "info")
         
-        for city_index, city in enumerate(cities_to_process):
-            # Check if search has been cancelled
-            if batch_id in active_searches and active_searches[batch_id]:
-                await log_to_supabase(batch_id, "🚫 Search was cancelled, stopping processing", "warning")
-                break
-            
-            await log_to_supabase(batch_id, f"🏙️ Processing city {city_index + 1}/{len(cities_to_process)}: {city}", "info")
+        async def process_city(city_index: int, city: str):
+            """Search one city's jobs and run its companies through the contact pipeline"""
+            await log_to_supabase(batch_id, f"🏙️ Processing city {city_index + 1}/{total_cities}: {city}", "info")
             
             try:
                 # Step 1: Search jobs in this city
                 await log_to_supabase(batch_id, f"🔍 Step 1: Searching jobs in {city} for query: {request.query}", "info")
                 
-                city_jobs = job_scraper._call_jobspy_api(
-                    search_term=search_params.get("search_term", request.query),
-                    location=city,
-                    hours_old=request.hours_old,
-                    job_type=search_params.get("job_type", "fulltime"),
-                    is_remote=search_params.get("is_remote", True),
-                    site_name=search_params.get("site_name", ["indeed", "linkedin", "zip_recruiter", "google", "glassdoor"]),
-                    results_wanted=50,  # Limit per city for faster processing
-                    offset=0,
-                    distance=25,
-                    easy_apply=False,
-                    country_indeed="us",
-                    google_search_term="",
-                    linkedin_fetch_description=True,
-                    verbose=False
-                )
+                city_jobs = await cached_job_search(job_scraper._call_jobspy_api, location=city, **base_kwargs)
                 
                 await log_to_supabase(batch_id, f"✅ Step 1 Complete: Found {len(city_jobs)} jobs in {city}", "success")
                 
                 # Update total jobs found
-                try:
-                    supabase.table("agents").update({
-                        "total_jobs_found": supabase.table("agents").select("total_jobs_found").eq("batch_id", batch_id).execute().data[0]["total_jobs_found"] + len(city_jobs)
-                    }).eq("batch_id", batch_id).execute()
-                except Exception as e:
-                    logger.error(f"❌ Error updating total jobs: {e}")
+                await increment_agent_counter(batch_id, "total_jobs_found", len(city_jobs))
                 
-                # Step 2: Process companies from this city
-                processed_companies = set()
-                city_companies = []
-                
-                # Extract unique companies from jobs
-                for job in city_jobs:
-                    company = job.get('company', '')
-                    if company and company not in processed_companies:
-                        processed_companies.add(company)
-                        city_companies.append({
-                            'company': company,
-                            'job': job
-                        })
+                # Step 2: Process companies from this city - one (first-listed) job per company
+                city_companies = first_job_per_company(city_jobs)
+                city_companies.pop('', None)  # jobs without a company name
                 
                 await log_to_supabase(batch_id, f"📊 Step 2: Found {len(city_companies)} unique companies in {city}", "info")
                 
-                # Process each company in the city
-                for company_index, company_data in enumerate(city_companies):
-                    # Check for cancellation before each company
-                    if batch_id in active_searches and active_searches[batch_id]:
-                        await log_to_supabase(batch_id, "🚫 Search was cancelled, stopping processing", "warning")
-                        break
-                    
-                    company = company_data['company']
-                    job = company_data['job']
-                    job_title = job.get('title', '')
-                    job_url = job.get('job_url', '')
-                    
-                    # Check if company has already been analyzed in previous batches
+                # One lookup for every company in the city that was analyzed in a previous batch
+                latest_analyses: Dict[str, Dict[str, Any]] = {}
+                if city_companies:
                     try:
-                        existing_analysis = supabase.table("company_analysis").select("*").eq("company", company).order("timestamp", desc=True).limit(1).execute()
+                        existing_analyses = await run_in_pool(
+                            API_POOL,
+                            supabase.table("company_analysis")
+                            .select("company,batch_id,recommendation,timestamp")
+                            .in_("company", [job['company'] for job in city_companies.values()])
+                            .order("timestamp", desc=True)
+                            .execute
+                        )
+                        # Rows are newest first, so keep the first one seen per company
+                        for row in existing_analyses.data or []:
+                            latest_analyses.setdefault(row['company'], row)
+                    except Exception as e:
+                        await log_to_supabase(batch_id, f"⚠️ Error checking existing analyses in {city}: {str(e)}", "warning")
+                
+                # Process the city's companies concurrently, bounded by company_semaphore
+                async def process_city_company(company_index: int, job: Dict[str, Any]):
+                    nonlocal processed_count
+                    async with company_semaphore:
+                        # Check for cancellation before each company
+                        if cancel_event.is_set():
+                            await log_to_supabase(batch_id, "🚫 Search was cancelled, stopping processing", "warning")
+                            return
                         
-                        if existing_analysis.data:
-                            existing = existing_analysis.data[0]
+                        company = job['company']
+                        job_title = job.get('title', '')
+                        job_url = job.get('job_url', '')
+                        
+                        # Check if company has already been analyzed in previous batches
+                        existing = latest_analyses.get(company)
+                        if existing:
                             await log_to_supabase(batch_id, f"⏭️ Skipping {company} - already analyzed in batch {existing['batch_id']} (recommendation: {existing['recommendation']})", "info", company)
-                            continue
-                    except Exception as e:
-                        await log_to_supabase(batch_id, f"⚠️ Error checking existing analysis for {company}: {str(e)}", "warning", company)
-                    
-                    await log_to_supabase(batch_id, f"🏢 Step 2: Processing company {company_index + 1}/{len(city_companies)}: {company} in {city}", "info", company)
-                    
-                    # Step 2a: Check blacklist
-                    await log_to_supabase(batch_id, f"⚫ Step 2a: Checking blacklist for {company}", "info", company)
-                    
-                    # Skip enterprise companies
-                    enterprise_companies = ["google", "microsoft", "amazon", "apple"]
-                    if company and any(enterprise in company.lower() for enterprise in enterprise_companies):
-                        await log_to_supabase(batch_id, f"⏭️ Step 2a: Skipping enterprise company: {company} (blacklisted)", "info", company)
-                        continue
-                    
-                    await log_to_supabase(batch_id, f"✅ Step 2a: {company} passed blacklist check", "success", company)
-                    
-                    # Step 2b: Domain finding
-                    await log_to_supabase(batch_id, f"🌐 Step 2b: Finding domain for {company}", "info", company)
-                    company_website = job.get('company_website')
-                    
-                    # If no website in job data, try to find domain using Clearout API
-                    if not company_website:
-                        try:
-                            url = "https://api.clearout.io/public/companies/autocomplete"
-                            params = {"query": company}
-                            
-                            import httpx
-                            async with httpx.AsyncClient() as client:
-                                response = await client.get(url, params=params, timeout=30.0)
-                                
-                                if response.status_code == 200:
-                                    data = response.json()
-                                    if data.get('status') == 'success' and data.get('data'):
-                                        # Get the best match with highest confidence
-                                        best_match = None
-                                        best_confidence = 0
-                                        
-                                        for company_data in data['data']:
-                                            confidence = company_data.get('confidence_score', 0)
-                                            if confidence > best_confidence and confidence >= 50:
-                                                best_confidence = confidence
-                                                best_match = company_data.get('domain')
-                                        
-                                        if best_match:
-                                            company_website = best_match
-                                            await log_to_supabase(batch_id, f"✅ Step 2b: Found domain via Clearout API: {company_website}", "success", company)
-                                        else:
-                                            await log_to_supabase(batch_id, f"⚠️ Step 2b: No high-confidence domain found for {company} (best confidence: {best_confidence})", "warning", company)
-                                    else:
-                                        await log_to_supabase(batch_id, f"⚠️ Step 2b: Clearout API failed for {company}: {data.get('message', 'Unknown error')}", "warning", company)
-                                else:
-                                    await log_to_supabase(batch_id, f"⚠️ Step 2b: Clearout API error for {company}: {response.status_code}", "warning", company)
-                        except Exception as e:
-                            await log_to_supabase(batch_id, f"❌ Step 2b: Domain finding failed for {company}: {str(e)}", "error", company)
-                    
-                    if company_website:
-                        await log_to_supabase(batch_id, f"✅ Step 2b: Using website: {company_website}", "success", company)
-                    else:
-                        await log_to_supabase(batch_id, f"⚠️ Step 2b: No website found for {company}", "warning", company)
-                    
-                    # Step 2c: LinkedIn company page resolution
-                    await log_to_supabase(batch_id, f"🔗 Step 2c: Resolving LinkedIn page for {company}", "info", company)
-                    
-                    # Step 3: Find contacts for this company
-                    await log_to_supabase(batch_id, f"👥 Step 3: Finding contacts for {company}", "info", company)
-                    
-                    try:
-                        contacts, has_ta_team, employee_roles, company_found = contact_finder.find_contacts(
-                            company=company,
-                            role_hint=job.get('title', ''),
-                            keywords=job_scraper.extract_keywords(job.get('description', '')),
-                            company_website=company_website
-                        )
+                            return
                         
-                        await log_to_supabase(batch_id, f"📊 Step 3: Found {len(contacts)} contacts, TA team: {has_ta_team} for {company}", "info", company)
+                        await log_to_supabase(batch_id, f"🏢 Step 2: Processing company {company_index + 1}/{len(city_companies)}: {company} in {city}", "info", company)
                         
-                        # Step 3a: RapidAPI calls logging
-                        await log_to_supabase(batch_id, f"📡 Step 3a: RapidAPI calls completed for {company}", "info", company)
+                        # Step 2a: Check blacklist
+                        await log_to_supabase(batch_id, f"⚫ Step 2a: Checking blacklist for {company}", "info", company)
                         
-                        # Step 3b: Hunter.io email discovery
-                        hunter_emails = []
-                        if not has_ta_team and company_found:
-                            await log_to_supabase(batch_id, f"🎯 Step 3b: Attempting Hunter.io lookup for {company} (no TA team found)", "info", company)
-                            
-                            try:
-                                hunter_emails = contact_finder.find_hunter_emails_for_target_company(
-                                    company=company,
-                                    job_title=job_title,
-                                    employee_roles=employee_roles,
-                                    company_website=company_website
-                                )
-                                
-                                if hunter_emails:
-                                    await log_to_supabase(batch_id, f"✅ Step 3b: Found {len(hunter_emails)} Hunter.io emails for {company}", "success", company)
-                                    await log_to_supabase(batch_id, f"📧 Hunter.io emails: {[email.get('email', 'N/A') for email in hunter_emails]}", "info", company)
-                                    tracker.save_hunter_emails(company, job_title, job_url, hunter_emails)
-                                else:
-                                    await log_to_supabase(batch_id, f"⚠️ Step 3b: No Hunter.io emails found for {company}", "warning", company)
-                                    tracker.save_hunter_emails(company, job_title, job_url, [])
-                                    
-                            except Exception as e:
-                                await log_to_supabase(batch_id, f"❌ Step 3b: Hunter.io error for {company}: {str(e)}", "error", company)
-                                tracker.save_hunter_emails(company, job_title, job_url, [], error=str(e))
-                        else:
-                            await log_to_supabase(batch_id, f"⏭️ Step 3b: Skipping Hunter.io for {company} (has TA team or company not found)", "info", company)
+                        # Skip enterprise companies
+                        if is_enterprise_company(company):
+                            await log_to_supabase(batch_id, f"⏭️ Step 2a: Skipping enterprise company: {company} (blacklisted)", "info", company)
+                            return
                         
-                        # Step 3c: Collect leads for batch processing (don't send to Instantly yet)
-                        if request.create_campaigns and hunter_emails:
-                            await log_to_supabase(batch_id, f"📝 Step 3c: Collecting {len(hunter_emails)} leads for {company} (will send to Instantly at end of batch)", "info", company)
-                            # Store leads for batch processing - we'll send them all at once at the end
-                            batch_leads.extend(hunter_emails)
-                        elif request.create_campaigns:
-                            await log_to_supabase(batch_id, f"⏭️ Step 3c: Skipping leads for {company} (no Hunter emails)", "info", company)
+                        await log_to_supabase(batch_id, f"✅ Step 2a: {company} passed blacklist check", "success", company)
                         
-                        # Create result
-                        result = WebhookResult(
-                            company=company,
-                            job_title=job_title,
-                            job_url=job.get('job_url', ''),
-                            has_ta_team=has_ta_team if has_ta_team is not None else False,
-                            contacts_found=len(contacts),
-                            top_contacts=contacts[:3] if contacts else [],
-                            recommendation="TARGET" if not has_ta_team else "SKIP - Has TA team",
-                            hunter_emails=[email_info["email"] for email_info in hunter_emails] if hunter_emails else [],
-                            timestamp=datetime.now().isoformat()
-                        )
+                        company_website = job.get('company_website')
+                        # find_contacts doesn't need the resolved domain, so its RapidAPI
+                        # lookups overlap with the Clearout call below
+                        contacts_task = asyncio.create_task(analyze_company_contacts(
+                            company,
+                            job_title,
+                            job_scraper.extract_keywords(job.get('description') or ''),
+                            company_website
+                        ))
                         
-                        results.append(result)
-                        processed_count += 1
+                        # Step 2b: Domain finding
+                        await log_to_supabase(batch_id, f"🌐 Step 2b: Finding domain for {company}", "info", company)
                         
-                        # Update processed companies count
-                        try:
-                            current_data = supabase.table("agents").select("processed_companies").eq("batch_id", batch_id).execute()
-                            if current_data.data and len(current_data.data) > 0:
-                                current_count = current_data.data[0].get("processed_companies", 0)
-                                supabase.table("agents").update({
-                                    "processed_companies": current_count + 1
-                                }).eq("batch_id", batch_id).execute()
+                        # If no website in job data, try to find domain using Clearout API
+                        if not company_website:
+                            company_website = await resolve_domain(company)
+                            if company_website:
+                                await log_to_supabase(batch_id, f"✅ Step 2b: Found domain via Clearout API: {company_website}", "success", company)
                             else:
-                                # Retry once after a short delay in case agent record is still being created
-                                await asyncio.sleep(1)
-                                current_data = supabase.table("agents").select("processed_companies").eq("batch_id", batch_id).execute()
-                                if current_data.data and len(current_data.data) > 0:
-                                    current_count = current_data.data[0].get("processed_companies", 0)
-                                    supabase.table("agents").update({
-                                        "processed_companies": current_count + 1
-                                    }).eq("batch_id", batch_id).execute()
-                                else:
-                                    logger.warning(f"⚠️ No agent record found for batch_id: {batch_id} (after retry)")
-                        except Exception as e:
-                            logger.error(f"❌ Error updating processed companies: {e}")
+                                await log_to_supabase(batch_id, f"⚠️ Step 2b: No domain found via Clearout API for {company}", "warning", company)
                         
-                        await log_to_supabase(batch_id, f"✅ Step 3 Complete: Finished analysis for {company} in {city}", "success", company)
+                        if company_website:
+                            await log_to_supabase(batch_id, f"✅ Step 2b: Using website: {company_website}", "success", company)
+                        else:
+                            await log_to_supabase(batch_id, f"⚠️ Step 2b: No website found for {company}", "warning", company)
                         
-                    except Exception as e:
-                        await log_to_supabase(batch_id, f"❌ Step 3 Error: Error analyzing {company}: {str(e)}", "error", company)
-                    
-                    # Add 3-second delay between companies (except for the last company in the city)
-                    if company_index < len(city_companies) - 1:
-                        await log_to_supabase(batch_id, f"⏳ Waiting 3 seconds before next company...", "info")
-                        await asyncio.sleep(3)
+                        # Step 2c: LinkedIn company page resolution
+                        await log_to_supabase(batch_id, f"🔗 Step 2c: Resolving LinkedIn page for {company}", "info", company)
+                        
+                        # Step 3: Find contacts for this company
+                        await log_to_supabase(batch_id, f"👥 Step 3: Finding contacts for {company}", "info", company)
+                        
+                        try:
+                            analysis = await contacts_task
+                            contacts = analysis['contacts']
+                            has_ta_team = analysis['has_ta_team']
+                            employee_roles = analysis['employee_roles']
+                            company_found = analysis['company_found']
+                            
+                            await log_to_supabase(batch_id, f"📊 Step 3: Found {len(contacts)} contacts, TA team: {has_ta_team} for {company}", "info", company)
+                            
+                            # Step 3a: RapidAPI calls logging
+                            await log_to_supabase(batch_id, f"📡 Step 3a: RapidAPI calls completed for {company}", "info", company)
+                            
+                            # Step 3b: Hunter.io email discovery
+                            hunter_emails = []
+                            if not has_ta_team and company_found:
+                                await log_to_supabase(batch_id, f"🎯 Step 3b: Attempting Hunter.io lookup for {company} (no TA team found)", "info", company)
+                                
+                                try:
+                                    hunter_emails = await find_hunter_emails(
+                                        company=company,
+                                        job_title=job_title,
+                                        employee_roles=employee_roles,
+                                        company_website=company_website
+                                    )
+                                    
+                                    if hunter_emails:
+                                        await log_to_supabase(batch_id, f"✅ Step 3b: Found {len(hunter_emails)} Hunter.io emails for {company}", "success", company)
+                                        if logger.isEnabledFor(logging.DEBUG):
+                                            logger.debug("📧 Hunter.io emails for %s: %s", company, [email.get('email', 'N/A') for email in hunter_emails])
+                                        tracker.save_hunter_emails(company, job_title, job_url, hunter_emails)
+                                    else:
+                                        await log_to_supabase(batch_id, f"⚠️ Step 3b: No Hunter.io emails found for {company}", "warning", company)
+                                        tracker.save_hunter_emails(company, job_title, job_url, [])
+                                        
+                                except Exception as e:
+                                    await log_to_supabase(batch_id, f"❌ Step 3b: Hunter.io error for {company}: {str(e)}", "error", company)
+                                    tracker.save_hunter_emails(company, job_title, job_url, [], error=str(e))
+                            else:
+                                await log_to_supabase(batch_id, f"⏭️ Step 3b: Skipping Hunter.io for {company} (has TA team or company not found)", "info", company)
+                            
+                            # Step 3c: Collect leads for batch processing (don't send to Instantly yet)
+                            if request.create_campaigns and hunter_emails:
+                                await log_to_supabase(batch_id, f"📝 Step 3c: Collecting {len(hunter_emails)} leads for {company} (will send to Instantly at end of batch)", "info", company)
+                                # Store leads for batch processing - we'll send them all at once at the end
+                                batch_leads.extend(hunter_emails)
+                            elif request.create_campaigns:
+                                await log_to_supabase(batch_id, f"⏭️ Step 3c: Skipping leads for {company} (no Hunter emails)", "info", company)
+                            
+                            # Create result
+                            result = WebhookResult(
+                                company=company,
+                                job_title=job_title,
+                                job_url=job_url,
+                                has_ta_team=has_ta_team if has_ta_team is not None else False,
+                                contacts_found=len(contacts),
+                                top_contacts=contacts[:3] if contacts else [],
+                                recommendation="TARGET" if not has_ta_team else "SKIP - Has TA team",
+                                hunter_emails=[email_info["email"] for email_info in hunter_emails] if hunter_emails else [],
+                                timestamp=_now_iso()
+                            )
+                            
+                            results.append(result)
+                            processed_count += 1
+                            
+                            # Update processed companies count
+                            await increment_agent_counter(batch_id, "processed_companies")
+                            await flush_tracker_if_full(tracker)
+                            
+                            await log_to_supabase(batch_id, f"✅ Step 3 Complete: Finished analysis for {company} in {city}", "success", company)
+                            
+                        except Exception as e:
+                            await log_to_supabase(batch_id, f"❌ Step 3 Error: Error analyzing {company}: {str(e)}", "error", company)
                 
-                await log_to_supabase(batch_id, f"✅ City Complete: Finished processing {city} - {len(processed_companies)} companies analyzed", "success")
+                await asyncio.gather(*(
+                    process_city_company(company_index, job)
+                    for company_index, job in enumerate(city_companies.values())
+                ))
                 
-                # Update processed cities count
-                try:
-                    current_data = supabase.table("agents").select("processed_cities").eq("batch_id", batch_id).execute()
-                    if current_data.data and len(current_data.data) > 0:
-                        current_count = current_data.data[0].get("processed_cities", 0)
-                        supabase.table("agents").update({
-                            "processed_cities": current_count + 1
-                        }).eq("batch_id", batch_id).execute()
-                    else:
-                        # Retry once after a short delay in case agent record is still being created
-                        await asyncio.sleep(1)
-                        current_data = supabase.table("agents").select("processed_cities").eq("batch_id", batch_id).execute()
-                        if current_data.data and len(current_data.data) > 0:
-                            current_count = current_data.data[0].get("processed_cities", 0)
-                            supabase.table("agents").update({
-                                "processed_cities": current_count + 1
-                            }).eq("batch_id", batch_id).execute()
-                        else:
-                            logger.warning(f"⚠️ No agent record found for batch_id: {batch_id} (after retry)")
-                except Exception as e:
-                    logger.error(f"❌ Error updating processed cities: {e}")
+                await log_to_supabase(batch_id, f"✅ City Complete: Finished processing {city} - {len(city_companies)} companies analyzed", "success")
                 
-                # Rate limiting between cities
-                if city_index < len(cities_to_process) - 1:
-                    await log_to_supabase(batch_id, f"⏳ Waiting 2 seconds before next city...", "info")
-                    await asyncio.sleep(2)
+                # Write the city's tracking rows in bulk
+                await flush_tracker(tracker)
+                
+                # Update processed cities count
+                await increment_agent_counter(batch_id, "processed_cities")
                     
             except Exception as e:
                 await log_to_supabase(batch_id, f"❌ Error processing city {city}: {str(e)}", "error")
-                continue
+        
+        # Cities are independent, so a few workers drain a shared queue of them;
+        # RapidAPI pacing comes from rate_limiter rather than pauses between cities
+        city_queue: asyncio.Queue = asyncio.Queue()
+        for city_item in enumerate(cities_to_process):
+            city_queue.put_nowait(city_item)
+        
+        async def city_worker():
+            while not city_queue.empty():
+                # Check if search has been cancelled
+                if cancel_event.is_set():
+                    await log_to_supabase(batch_id, "🚫 Search was cancelled, stopping processing", "warning")
+                    return
+                city_index, city = city_queue.get_nowait()
+                await process_city(city_index, city)
+        
+        workers = asyncio.gather(*(city_worker() for _ in range(JOBSPY_CONCURRENCY)))
+        cancel_waiter = asyncio.create_task(cancel_event.wait())
+        await asyncio.wait({workers, cancel_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        cancel_waiter.cancel()
+        if not workers.done():
+            # Cancelled mid-city - stop the in-flight searches and analyses instead of finishing them
+            workers.cancel()
+            try:
+                await workers
+            except asyncio.CancelledError:
+                pass
         
         # Check if search was cancelled during processing
-        if batch_id in active_searches and active_searches[batch_id]:
-            await log_to_supabase(batch_id, f"🚫 Agent was cancelled during processing. Analyzed {processed_count} companies across {len(cities_to_process)} cities", "warning")
+        if cancel_event.is_set():
+            await log_to_supabase(batch_id, f"🚫 Agent was cancelled during processing. Analyzed {processed_count} companies across {total_cities} cities", "warning")
             
             # Update agent status to cancelled
             try:
-                supabase.table("agents").update({
+                await update_agent(batch_id, {
                     "status": "cancelled",
                     "end_time": datetime.now().isoformat(),
                     "processed_companies": processed_count,
-                    "processed_cities": len(cities_to_process)
-                }).eq("batch_id", batch_id).execute()
+                    "processed_cities": total_cities
+                })
                 logger.info(f"✅ Agent {batch_id} marked as cancelled")
             except Exception as e:
                 logger.error(f"❌ Error updating agent cancellation status: {e}")
         else:
             # Send final webhook with all results
-            await log_to_supabase(batch_id, f"🎉 Processing complete! Analyzed {processed_count} companies across {len(cities_to_process)} cities", "success")
+            await log_to_supabase(batch_id, f"🎉 Processing complete! Analyzed {processed_count} companies across {total_cities} cities", "success")
             
             # Update agent status to completed
             try:
-                supabase.table("agents").update({
+                await update_agent(batch_id, {
                     "status": "completed",
                     "end_time": datetime.now().isoformat(),
                     "processed_companies": processed_count,
-                    "processed_cities": len(cities_to_process)
-                }).eq("batch_id", batch_id).execute()
+                    "processed_cities": total_cities
+                })
                 logger.info(f"✅ Agent {batch_id} marked as completed")
             except Exception as e:
                 logger.error(f"❌ Error updating agent completion status: {e}")
@@ -2224,11 +2886,6 @@ async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request:
             
             try:
                 # Call the Edge Function to send all leads to Instantly.ai
-                import httpx
-                
-                # Prepare the request for the Edge Function
-                edge_function_url = f"{os.getenv('SUPABASE_URL', '')}/functions/v1/send-to-instantly"
-                
                 edge_function_payload = {
                     "batch_id": batch_id,
                     "action": "create_leads",
@@ -2238,28 +2895,20 @@ async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request:
                     "domain": None  # Let Edge Function handle domain extraction
                 }
                 
-                # Get the service role key for the Edge Function
-                service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-                if not service_role_key:
+                if not SERVICE_ROLE_KEY:
                     await log_to_supabase(batch_id, f"❌ SUPABASE_SERVICE_ROLE_KEY not configured", "error")
                 else:
-                    headers = {
-                        "Authorization": f"Bearer {service_role_key}",
-                        "Content-Type": "application/json"
-                    }
-                    
                     await log_to_supabase(batch_id, f"📡 Calling Edge Function to send {total_leads} leads to Instantly.ai", "info")
                     
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            edge_function_url,
-                            json=edge_function_payload,
-                            headers=headers,
-                            timeout=30.0
-                        )
+                    response = await http_client.post(
+                        EDGE_FUNCTION_URL,
+                        json=edge_function_payload,
+                        headers=EDGE_FUNCTION_HEADERS,
+                        timeout=30.0
+                    )
                     
                     if response.status_code == 200:
-                        result = response.json()
+                        result = json_loads(response.content)
                         if result.get('success'):
                             created_leads = result.get('created_leads', [])
                             leads_added += len(created_leads)
@@ -2277,33 +2926,36 @@ async def process_jobs_background_task(batch_id: str, jobs: List[Dict], request:
                 await log_to_supabase(batch_id, f"❌ Error calling Edge Function for batch leads: {str(e)}", "error")
                 tracker.save_instantly_campaign("Multiple Companies", error=str(e))
         
+        # Write the batch campaign row and anything left from a failed city
+        await flush_tracker(tracker)
+        
         # Only send webhook for completed agents, not cancelled ones
-        if not (batch_id in active_searches and active_searches[batch_id]):
+        if not cancel_event.is_set():
             webhook_data = WebhookRequest(
                 batch_id=batch_id,
                 results=results,
                 summary={
                     "total_companies": processed_count,
-                    "total_cities": len(cities_to_process),
+                    "total_cities": total_cities,
                     "target_companies": len([r for r in results if r.recommendation == "TARGET"]),
                     "skipped_companies": len([r for r in results if "SKIP" in r.recommendation])
                 },
-                timestamp=datetime.now().isoformat()
+                timestamp=_now_iso()
             )
             
+            # Make the batch's logs visible before consumers react to the webhook
+            await flush_logs()
             await send_webhook(webhook_data)
         
         # Clean up
-        if batch_id in active_searches:
-            del active_searches[batch_id]
+        finish_search(batch_id)
             
     except Exception as e:
         logger.error(f"Error in background task: {e}")
         await log_to_supabase(batch_id, f"❌ Background task error: {str(e)}", "error")
         
         # Clean up on error
-        if batch_id in active_searches:
-            del active_searches[batch_id]
+        finish_search(batch_id)
 
 async def send_webhook(webhook_data: WebhookRequest):
     """Send webhook to configured endpoint"""
@@ -2311,21 +2963,20 @@ async def send_webhook(webhook_data: WebhookRequest):
         # In production, this would be your webhook URL
         webhook_url = "http://localhost:8000/webhook/results"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                webhook_url,
-                json=webhook_data.dict(),
-                headers={"Content-Type": "application/json"}
-            )
-            
+        response = await http_client.post(
+            webhook_url,
+            json=webhook_data.dict(),
+            headers={"Content-Type": "application/json"}
+        )
+        
         logger.info(f"Webhook sent successfully: {response.status_code}")
         
     except Exception as e:
         logger.error(f"Error sending webhook: {e}")
 
 @app.get("/batch/{batch_id}")
-async def get_batch_results(batch_id: str):
-    """Get results for a specific batch"""
+async def get_batch_results(batch_id: str, include: str = "logs,hunter_emails", limit: Optional[int] = Query(None, ge=1)):
+    """Get results for a specific batch; include picks which of logs/hunter_emails to fetch (limit caps each, default 100 logs and all emails)"""
     try:
         if not supabase:
             raise HTTPException(status_code=503, detail="Supabase not configured")
@@ -2335,28 +2986,38 @@ async def get_batch_results(batch_id: str):
         
         if agent_response.data:
             agent = agent_response.data[0]
-            logger.info(f"✅ Found agent for batch {batch_id}: {agent}")
+            logger.info(f"✅ Found agent for batch {batch_id}")
+            
+            included = set(include.split(","))
+            logs = hunter_emails = total_logs = total_hunter_emails = None
             
             # Get logs for this batch
-            try:
-                logs_response = supabase.table("search_logs_enhanced").select("*").eq("batch_id", batch_id).order("timestamp", desc=True).limit(100).execute()
-                logs = logs_response.data
-            except Exception:
-                logs = []
+            if "logs" in included:
+                try:
+                    logs_response = supabase.table(_LOG_TABLE).select(LOG_COLUMNS, count="exact").eq("batch_id", batch_id).order("timestamp", desc=True).limit(limit or 100).execute()
+                    logs = logs_response.data
+                    total_logs = logs_response.count if logs_response.count is not None else len(logs)
+                except Exception:
+                    logs, total_logs = [], 0
             
             # Get hunter_emails for this batch
-            try:
-                hunter_emails_response = supabase.table("hunter_emails").select("*").eq("batch_id", batch_id).order("timestamp", desc=True).execute()
-                hunter_emails = hunter_emails_response.data
-            except Exception:
-                hunter_emails = []
+            if "hunter_emails" in included:
+                try:
+                    hunter_emails_query = supabase.table("hunter_emails").select("*", count="exact").eq("batch_id", batch_id).order("timestamp", desc=True)
+                    if limit is not None:
+                        hunter_emails_query = hunter_emails_query.limit(limit)
+                    hunter_emails_response = hunter_emails_query.execute()
+                    hunter_emails = hunter_emails_response.data
+                    total_hunter_emails = hunter_emails_response.count if hunter_emails_response.count is not None else len(hunter_emails)
+                except Exception:
+                    hunter_emails, total_hunter_emails = [], 0
             
             return {
                 "agent": agent,
                 "logs": logs,
                 "hunter_emails": hunter_emails,
-                "total_logs": len(logs),
-                "total_hunter_emails": len(hunter_emails),
+                "total_logs": total_logs,
+                "total_hunter_emails": total_hunter_emails,
                 "batch_id": batch_id,
                 "status": agent.get("status", "unknown"),
                 "query": agent.get("query", ""),
@@ -2391,11 +3052,11 @@ async def get_all_batches(limit: int = 10, offset: int = 0):
         if not supabase:
             raise HTTPException(status_code=503, detail="Supabase not configured")
         
-        response = supabase.table("batches").select("*").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
+        response = supabase.table("batches").select("batch_id,timestamp,status", count="exact").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
         
         return {
             "batches": response.data,
-            "total": len(response.data)
+            "total": response.count if response.count is not None else len(response.data)
         }
         
     except Exception as e:
@@ -2432,11 +3093,11 @@ async def get_target_companies(limit: int = 20, offset: int = 0):
         if not supabase:
             raise HTTPException(status_code=503, detail="Supabase not configured")
         
-        response = supabase.table("company_analysis").select("*").eq("recommendation", "TARGET").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
+        response = supabase.table("company_analysis").select("*", count="exact").eq("recommendation", "TARGET").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
         
         return {
             "target_companies": response.data,
-            "total": len(response.data)
+            "total": response.count if response.count is not None else len(response.data)
         }
         
     except Exception as e:
@@ -2450,11 +3111,7 @@ async def get_search_logs(batch_id: str, limit: int = 100):
         raise HTTPException(status_code=503, detail="Supabase not configured")
     
     try:
-        # Try enhanced table first, fallback to old table
-        try:
-            response = supabase.table("search_logs_enhanced").select("*").eq("batch_id", batch_id).order("timestamp", desc=True).limit(limit).execute()
-        except Exception:
-            response = supabase.table("search_logs").select("*").eq("batch_id", batch_id).order("timestamp", desc=True).limit(limit).execute()
+        response = supabase.table(_LOG_TABLE).select(LOG_COLUMNS).eq("batch_id", batch_id).order("timestamp", desc=True).limit(limit).execute()
         
         return {"logs": response.data}
     except Exception as e:
@@ -2462,19 +3119,16 @@ async def get_search_logs(batch_id: str, limit: int = 100):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/logs")
-async def get_all_logs(limit: int = 100, offset: int = 0):
+async def get_all_logs(limit: int = Query(100, ge=1, le=LOGS_MAX_LIMIT), offset: int = Query(0, ge=0)):
     """Get all search logs from Supabase"""
     if not supabase:
         raise HTTPException(status_code=503, detail="Supabase not configured")
     
     try:
-        # Try enhanced table first, fallback to old table
-        try:
-            response = supabase.table("search_logs_enhanced").select("*").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
-        except Exception:
-            response = supabase.table("search_logs").select("*").order("timestamp", desc=True).range(offset, offset + limit - 1).execute()
+        # Limits past the 1000-row response cap are fetched as several ranges
+        logs = await fetch_rows_paged(lambda: supabase.table(_LOG_TABLE).select(LOG_COLUMNS).order("timestamp", desc=True), offset, limit)
         
-        return {"logs": response.data}
+        return {"logs": logs}
     except Exception as e:
         logger.error(f"Error fetching logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2487,20 +3141,26 @@ async def get_agent_history(query: str, limit: int = 10):
     
     try:
         # Get batches for this query
-        response = supabase.table("batches").select("*").ilike("summary", f"%{query}%").order("timestamp", desc=True).limit(limit).execute()
+        response = supabase.table("batches").select("batch_id,timestamp,status,summary").ilike("summary", f"%{query}%").order("timestamp", desc=True).limit(limit).execute()
+        
+        # Exact log count plus the 5 most recent logs per batch, one bounded query per batch run concurrently
+        logs_responses = await asyncio.gather(*(
+            run_in_pool(
+                API_POOL,
+                supabase.table("search_logs").select(LOG_COLUMNS, count="exact").eq("batch_id", batch["batch_id"]).order("timestamp", desc=True).limit(5).execute
+            )
+            for batch in response.data
+        ))
         
         agent_history = []
-        for batch in response.data:
-            # Get logs for this batch
-            logs_response = supabase.table("search_logs").select("*").eq("batch_id", batch["batch_id"]).order("timestamp", desc=True).limit(50).execute()
-            
+        for batch, logs_response in zip(response.data, logs_responses):
             agent_history.append({
                 "batch_id": batch["batch_id"],
                 "timestamp": batch["timestamp"],
                 "status": batch["status"],
                 "summary": batch["summary"],
-                "logs_count": len(logs_response.data),
-                "recent_logs": logs_response.data[:5]  # Last 5 logs
+                "logs_count": logs_response.count or 0,
+                "recent_logs": logs_response.data  # Last 5 logs
             })
         
         return {
@@ -2513,37 +3173,40 @@ async def get_agent_history(query: str, limit: int = 10):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/agent-templates")
-async def get_agent_templates():
+async def get_agent_templates(request: Request):
     """Get all agent templates"""
     if not supabase:
         raise HTTPException(status_code=503, detail="Supabase not configured")
     
     try:
         response = supabase.table("agent_templates").select("*").order("name").execute()
-        return response.data
+        return cacheable_json(request, response.data)
     except Exception as e:
         logger.error(f"Error fetching agent templates: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/dashboard-stats")
-async def get_dashboard_stats():
+async def get_dashboard_stats(request: Request):
     """Get dashboard statistics"""
     if not supabase:
         raise HTTPException(status_code=503, detail="Supabase not configured")
     
     try:
-        # Get stats from the view
-        response = supabase.table("agent_dashboard_stats").select("*").execute()
+        # Get stats from the materialized view (refreshed every minute, see materialize_dashboard_views.sql)
+        response = await cached_dashboard_call(
+            "dashboard-stats",
+            supabase.table("agent_dashboard_stats_mv").select("active_agents,total_runs,total_jobs,avg_success_rate,avg_duration").execute
+        )
         if response.data:
-            return response.data[0]
+            return cacheable_json(request, response.data[0])
         else:
-            return {
+            return cacheable_json(request, {
                 "active_agents": 0,
                 "total_runs": 0,
                 "total_jobs": 0,
                 "avg_success_rate": 0.0,
                 "avg_duration": 0
-            }
+            })
     except Exception as e:
         logger.error(f"Error fetching dashboard stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2555,7 +3218,10 @@ async def get_recent_activity(limit: int = 10):
         raise HTTPException(status_code=503, detail="Supabase not configured")
     
     try:
-        response = supabase.table("recent_agent_activity").select("*").limit(limit).execute()
+        # Materialized view refreshed every minute (see materialize_dashboard_views.sql)
+        response = supabase.table("recent_agent_activity_mv").select(
+            "batch_id,query,start_time,duration_seconds,jobs_found,success_rate,batch_status"
+        ).order("start_time", desc=True).limit(limit).execute()
         return response.data
     except Exception as e:
         logger.error(f"Error fetching recent activity: {e}")
@@ -2571,45 +3237,38 @@ async def get_instantly_campaigns(batch_id: Optional[str] = None):
             if supabase:
                 try:
                     response = supabase.table("instantly_campaigns").select("*").eq("batch_id", batch_id).execute()
+                    rows = [campaign for campaign in response.data if campaign.get("campaign_id")]
+                    
+                    # Get additional details from Instantly.ai concurrently, once per distinct campaign
+                    # (an agent's companies usually share one campaign)
+                    campaign_ids = list(dict.fromkeys(campaign["campaign_id"] for campaign in rows))
+                    instantly_semaphore = asyncio.Semaphore(INSTANTLY_CONCURRENCY)
+                    
+                    async def fetch_campaign(campaign_id: str):
+                        async with instantly_semaphore:
+                            return await run_in_pool(API_POOL, instantly_manager.get_campaign, campaign_id)
+                    
+                    fetched = await asyncio.gather(*(fetch_campaign(campaign_id) for campaign_id in campaign_ids), return_exceptions=True)
+                    details = {}
+                    for campaign_id, instantly_campaign in zip(campaign_ids, fetched):
+                        if isinstance(instantly_campaign, Exception):
+                            logger.warning(f"Could not fetch Instantly campaign {campaign_id}: {instantly_campaign}")
+                        elif instantly_campaign:
+                            details[campaign_id] = instantly_campaign
+                    
                     campaigns = []
-                    for campaign in response.data:
-                        # Get additional details from Instantly.ai if campaign_id exists
-                        if campaign.get("campaign_id"):
-                            try:
-                                instantly_campaign = instantly_manager.get_campaign(campaign["campaign_id"])
-                                if instantly_campaign:
-                                    campaigns.append({
-                                        "id": campaign["campaign_id"],
-                                        "name": campaign["campaign_name"] or instantly_campaign.get("name", "Unknown"),
-                                        "status": instantly_campaign.get("status", "unknown"),
-                                        "leads_count": campaign["leads_added"],
-                                        "batch_id": campaign["batch_id"],
-                                        "company": campaign["company"],
-                                        "created_at": campaign["timestamp"]
-                                    })
-                                else:
-                                    # Fallback to database data
-                                    campaigns.append({
-                                        "id": campaign["campaign_id"],
-                                        "name": campaign["campaign_name"] or "Unknown",
-                                        "status": "unknown",
-                                        "leads_count": campaign["leads_added"],
-                                        "batch_id": campaign["batch_id"],
-                                        "company": campaign["company"],
-                                        "created_at": campaign["timestamp"]
-                                    })
-                            except Exception as e:
-                                logger.warning(f"Could not fetch Instantly campaign {campaign['campaign_id']}: {e}")
-                                # Fallback to database data
-                                campaigns.append({
-                                    "id": campaign["campaign_id"],
-                                    "name": campaign["campaign_name"] or "Unknown",
-                                    "status": "unknown",
-                                    "leads_count": campaign["leads_added"],
-                                    "batch_id": campaign["batch_id"],
-                                    "company": campaign["company"],
-                                    "created_at": campaign["timestamp"]
-                                })
+                    for campaign in rows:
+                        # Fall back to database data when Instantly.ai has no details
+                        instantly_campaign = details.get(campaign["campaign_id"], {})
+                        campaigns.append({
+                            "id": campaign["campaign_id"],
+                            "name": campaign["campaign_name"] or instantly_campaign.get("name", "Unknown"),
+                            "status": instantly_campaign.get("status", "unknown"),
+                            "leads_count": campaign["leads_added"],
+                            "batch_id": campaign["batch_id"],
+                            "company": campaign["company"],
+                            "created_at": campaign["timestamp"]
+                        })
                     return campaigns
                 except Exception as e:
                     logger.error(f"Error fetching campaigns for batch {batch_id}: {e}")
@@ -2641,6 +3300,7 @@ async def activate_instantly_campaign(campaign_id: str):
     """Activate an Instantly.ai campaign"""
     try:
         result = instantly_manager.activate_campaign(campaign_id)
+        _DASHBOARD_CACHE.clear()
         return {"message": "Campaign activated successfully", "campaign_id": campaign_id}
     except Exception as e:
         logger.error(f"Error activating Instantly campaign {campaign_id}: {e}")
@@ -2651,6 +3311,7 @@ async def pause_instantly_campaign(campaign_id: str):
     """Pause an Instantly.ai campaign"""
     try:
         result = instantly_manager.pause_campaign(campaign_id)
+        _DASHBOARD_CACHE.clear()
         return {"message": "Campaign paused successfully", "campaign_id": campaign_id}
     except Exception as e:
         logger.error(f"Error pausing Instantly campaign {campaign_id}: {e}")
@@ -2707,51 +3368,58 @@ async def export_instantly_lead(lead_id: str):
 async def export_campaign_leads(campaign_id: str, format: str = "csv"):
     """Export all leads from a campaign"""
     try:
-        leads = instantly_manager.get_leads_for_campaign(campaign_id)
+        leads = await run_in_pool(API_POOL, instantly_manager.get_leads_for_campaign, campaign_id)
         if not leads:
             raise HTTPException(status_code=404, detail="No leads found for this campaign")
         
         if format.lower() == "csv":
-            # Generate CSV content
-            import csv
-            import io
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                "Name", "Email", "Company", "Title", "LinkedIn URL", 
-                "Score", "Status", "Email Verified", "Verification Score"
-            ])
-            
-            # Write data
-            for lead in leads:
+            def csv_rows():
+                """Encode the export CSV_CHUNK_ROWS rows at a time so the whole file is never held in memory"""
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                
+                def flush() -> bytes:
+                    row = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    return row.encode()
+                
+                # Write header
                 writer.writerow([
-                    lead.get("name", ""),
-                    lead.get("email", ""),
-                    lead.get("company", ""),
-                    lead.get("title", ""),
-                    lead.get("linkedin_url", ""),
-                    lead.get("score", ""),
-                    lead.get("status", ""),
-                    lead.get("email_verified", False),
-                    lead.get("verification_score", 0)
+                    "Name", "Email", "Company", "Title", "LinkedIn URL", 
+                    "Score", "Status", "Email Verified", "Verification Score"
                 ])
+                
+                # Write data
+                for i, lead in enumerate(leads, 1):
+                    writer.writerow([
+                        lead.get("name", ""),
+                        lead.get("email", ""),
+                        lead.get("company", ""),
+                        lead.get("title", ""),
+                        lead.get("linkedin_url", ""),
+                        lead.get("score", ""),
+                        lead.get("status", ""),
+                        lead.get("email_verified", False),
+                        lead.get("verification_score", 0)
+                    ])
+                    if i % CSV_CHUNK_ROWS == 0:
+                        yield flush()
+                yield flush()
             
-            csv_content = output.getvalue()
-            output.close()
-            
-            return {
-                "message": f"Successfully exported {len(leads)} leads",
-                "campaign_id": campaign_id,
-                "format": "csv",
-                "content": csv_content,
-                "filename": f"campaign_{campaign_id}_leads.csv"
-            }
+            return StreamingResponse(
+                csv_rows(),
+                media_type="text/csv",
+                headers={
+                    "Content-Disposition": f'attachment; filename="campaign_{campaign_id}_leads.csv"',
+                    "X-Leads-Count": str(len(leads))
+                }
+            )
         else:
             raise HTTPException(status_code=400, detail="Unsupported format. Use 'csv'")
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error exporting campaign leads: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2760,8 +3428,11 @@ async def export_campaign_leads(campaign_id: str, format: str = "csv"):
 async def get_real_time_analytics():
     """Get real-time campaign analytics"""
     try:
-        # Get all campaigns
-        campaigns = instantly_manager.get_all_campaigns()
+        # Get all campaigns and their analytics - two Instantly.ai calls, made concurrently
+        campaigns, analytics_by_id = await asyncio.gather(
+            run_in_pool(API_POOL, instantly_manager.get_all_campaigns, include_analytics=False),
+            run_in_pool(API_POOL, instantly_manager.get_campaign_analytics_bulk)
+        )
         
         real_time_data = {
             "total_campaigns": len(campaigns),
@@ -2777,8 +3448,7 @@ async def get_real_time_analytics():
         for campaign in campaigns:
             campaign_id = campaign.get("id")
             if campaign_id:
-                # Get campaign analytics
-                analytics = instantly_manager.get_campaign_analytics(campaign_id)
+                analytics = analytics_by_id.get(campaign_id)
                 if analytics:
                     campaign_data = {
                         "id": campaign_id,
@@ -2814,28 +3484,28 @@ async def get_real_time_analytics():
 async def get_instantly_stats():
     """Get Instantly.ai statistics"""
     try:
-        stats = instantly_manager.get_stats()
+        stats = await cached_dashboard_call("instantly-stats", instantly_manager.get_stats)
         return stats
     except Exception as e:
         logger.error(f"Error fetching Instantly stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/instantly-analytics/overview")
-async def get_instantly_analytics_overview():
+async def get_instantly_analytics_overview(request: Request):
     """Get Instantly.ai analytics overview"""
     try:
-        overview = instantly_manager.get_campaign_analytics_overview()
-        return overview
+        overview = await cached_dashboard_call("instantly-analytics-overview", instantly_manager.get_campaign_analytics_overview)
+        return cacheable_json(request, overview)
     except Exception as e:
         logger.error(f"Error fetching Instantly analytics overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/instantly-analytics/daily")
-async def get_instantly_daily_analytics(start_date: str = None, end_date: str = None):
+async def get_instantly_daily_analytics(request: Request, start_date: str = None, end_date: str = None):
     """Get Instantly.ai daily analytics"""
     try:
-        daily_analytics = instantly_manager.get_daily_campaign_analytics(start_date, end_date)
-        return {"daily_analytics": daily_analytics}
+        daily_analytics = await run_in_pool(API_POOL, instantly_manager.get_daily_campaign_analytics, start_date, end_date)
+        return cacheable_json(request, {"daily_analytics": daily_analytics})
     except Exception as e:
         logger.error(f"Error fetching Instantly daily analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,22 @@
+-- Atomic progress counter increments for the agents table
+-- Replaces the select-then-update pattern in the background job processor,
+-- which lost updates when several workers finished at the same time
+
+CREATE OR REPLACE FUNCTION inc_agent(p_batch TEXT, p_field TEXT, p_delta INTEGER DEFAULT 1)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Only the progress counters may be incremented through this function
+    IF p_field NOT IN ('total_jobs_found', 'processed_companies', 'processed_cities') THEN
+        RAISE EXCEPTION 'inc_agent: unsupported field %', p_field;
+    END IF;
+
+    EXECUTE format(
+        'UPDATE agents SET %I = COALESCE(%I, 0) + $1, updated_at = NOW() WHERE batch_id = $2',
+        p_field, p_field
+    ) USING p_delta, p_batch;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION inc_agent(TEXT, TEXT, INTEGER) TO anon, authenticated, service_role;
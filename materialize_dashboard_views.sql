@@ -0,0 +1,51 @@
+-- Materialized copies of the dashboard views
+-- agent_dashboard_stats and recent_agent_activity re-aggregate agent_performance
+-- (and join batches) on every dashboard poll; these are refreshed once a minute instead.
+-- The plain views are left in place for ad-hoc querying.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS agent_dashboard_stats_mv AS
+SELECT 
+    1 as id,  -- single row; lets REFRESH ... CONCURRENTLY use a unique index
+    COUNT(DISTINCT batch_id) as active_agents,
+    COUNT(*) as total_runs,
+    SUM(jobs_found) as total_jobs,
+    AVG(success_rate) as avg_success_rate,
+    AVG(duration_seconds) as avg_duration
+FROM agent_performance;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_agent_dashboard_stats_mv_id ON agent_dashboard_stats_mv(id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS recent_agent_activity_mv AS
+SELECT 
+    ap.id,
+    ap.batch_id,
+    ap.query,
+    ap.start_time,
+    ap.duration_seconds,
+    ap.jobs_found,
+    ap.success_rate,
+    b.status as batch_status
+FROM agent_performance ap
+LEFT JOIN batches b ON ap.batch_id = b.batch_id
+ORDER BY ap.start_time DESC
+LIMIT 20;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_recent_agent_activity_mv_id ON recent_agent_activity_mv(id);
+CREATE INDEX IF NOT EXISTS idx_recent_agent_activity_mv_start_time ON recent_agent_activity_mv(start_time DESC);
+
+GRANT SELECT ON agent_dashboard_stats_mv, recent_agent_activity_mv TO anon, authenticated, service_role;
+
+-- Refresh without blocking readers of the previous snapshot
+CREATE OR REPLACE FUNCTION refresh_dashboard_views()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY agent_dashboard_stats_mv;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY recent_agent_activity_mv;
+END;
+$$;
+
+-- Refresh every minute with pg_cron (enable the extension under Database > Extensions first)
+CREATE EXTENSION IF NOT EXISTS pg_cron;
+SELECT cron.schedule('refresh-dashboard-views', '* * * * *', 'SELECT refresh_dashboard_views()');
@@ -8,7 +8,7 @@ setup(
         "fastapi==0.104.1",
         "uvicorn[standard]==0.24.0",
         "requests==2.31.0",
-        "httpx==0.24.1",
+        "httpx[http2]==0.24.1",
         "openai>=1.12.0",
         "pydantic==2.5.0",
         "streamlit==1.28.1",
@@ -16,6 +16,9 @@ setup(
         "python-dotenv==1.0.0",
         "jinja2==3.1.2",
         "python-multipart==0.0.6",
+        "orjson==3.9.10",
+        "msgspec==0.18.4",
+        "redis==5.0.0",
     ],
     python_requires=">=3.11",
 ) 
\ No newline at end of file
@@ -54,7 +54,7 @@ serve(async (req) => {
   }
 
   try {
-    const { batch_id, campaign_id, list_id, action, hunter_emails, company, job_title, domain } = await req.json()
+    const { batch_id, campaign_id, list_id, action, hunter_emails, company, job_title, domain, companies } = await req.json()
 
     // Validate required fields
     if (!batch_id) {
@@ -101,7 +101,15 @@ serve(async (req) => {
     console.log(`🔍 Debug: hunter_emails length:`, hunter_emails ? hunter_emails.length : 'undefined')
     console.log(`🔍 Debug: hunter_emails type:`, typeof hunter_emails)
     
-    if (hunter_emails && hunter_emails.length > 0) {
+    if (companies && companies.length > 0) {
+      // Bulk payload: one entry per company with its own emails and domain
+      hunterEmailsData = companies.map((entry: any) => ({
+        company: entry.company || 'Unknown',
+        email_list: entry.hunter_emails || [],
+        domain: entry.domain || null
+      }))
+      console.log(`📧 Using emails for ${companies.length} companies from payload`)
+    } else if (hunter_emails && hunter_emails.length > 0) {
       // Use emails from payload
       hunterEmailsData = [{
         company: company || 'Unknown',
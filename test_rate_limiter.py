@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test AsyncRateLimiter's handling of provider rate-limit headers
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api import AsyncRateLimiter
+
+def test_seconds_reset():
+    """A reset given in seconds pauses for that long, even past a monthly quota's worth"""
+    for time_window in (1, 60):
+        limiter = AsyncRateLimiter("test", max_requests=5, time_window=time_window)
+        month = 30 * 24 * 3600
+        delay = limiter.update_from_headers({"x-ratelimit-requests-remaining": "0", "x-ratelimit-requests-reset": str(month)})
+        assert delay == month, delay
+        assert limiter.paused_until >= time.time() + month - 5
+    print("✅ Seconds-style reset pauses for the given seconds")
+
+def test_epoch_reset():
+    """A reset given as an epoch timestamp pauses until that time"""
+    limiter = AsyncRateLimiter("test", max_requests=20, time_window=60)
+    reset_at = time.time() + 120
+    delay = limiter.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(reset_at)})
+    assert 115 < delay <= 120, delay
+    assert abs(limiter.paused_until - reset_at) < 1
+    print("✅ Epoch-style reset pauses until the timestamp")
+
+def test_no_pause_with_quota_left():
+    """Remaining quota means no pause"""
+    limiter = AsyncRateLimiter("test", max_requests=20, time_window=60)
+    delay = limiter.update_from_headers({"x-ratelimit-remaining": "3", "x-ratelimit-reset": "30"})
+    assert delay == 0.0 and limiter.paused_until == 0.0
+    print("✅ No pause while quota remains")
+
+if __name__ == "__main__":
+    test_seconds_reset()
+    test_epoch_reset()
+    test_no_pause_with_quota_left()
@@ -6,7 +6,7 @@ Blacklist Manager - Track companies to skip before making API calls
 import os
 import json
 import logging
-from typing import List, Set
+from typing import List, Set, FrozenSet
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -49,6 +49,10 @@ class BlacklistManager:
         company_lower = company.lower().strip()
         return company_lower in self.blacklisted_companies
     
+    def as_set(self) -> FrozenSet[str]:
+        """Snapshot of blacklisted company keys (lowercased, stripped) for fast membership checks"""
+        return frozenset(self.blacklisted_companies)
+    
     def add_to_blacklist(self, company: str, reason: str = ""):
         """Add company to blacklist"""
         company_lower = company.lower().strip()
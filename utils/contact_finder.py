@@ -12,6 +12,11 @@ class ContactFinder:
         self.rapidapi_key = os.getenv("RAPIDAPI_KEY", "")
         self.hunter_api_key = os.getenv("HUNTER_API_KEY", "")
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
+        # Reused across calls (and the worker threads calling us) so TLS connections stay pooled
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
     def check_ta_team_with_openai(self, company: str) -> Optional[bool]:
         """Check if company has TA team using OpenAI's knowledge base first"""
@@ -93,7 +98,7 @@ class ContactFinder:
             logger.info(f"📡 Step 2: Calling RapidAPI for company profile: {linkedin_company_name}")
             
             # Get company profile
-            profile_response = requests.get(
+            profile_response = self.session.get(
                 profile_url,
                 params={"company": linkedin_company_name},
                 headers=headers,
@@ -109,7 +114,7 @@ class ContactFinder:
             
             try:
                 profile_data = profile_response.json()
-                logger.info(f"📡 RapidAPI response data: {profile_data}")
+                logger.debug("📡 RapidAPI response data: %s", profile_data)
             except Exception as e:
                 logger.error(f"❌ Failed to parse RapidAPI response for {company}: {e}")
                 logger.error(f"❌ Raw response: {profile_response.text}")
@@ -125,7 +130,7 @@ class ContactFinder:
             logger.info(f"📊 Step 3: Extracting company information for {company}")
             
             company_info = profile_data.get("data", {})
-            logger.info(f"📊 Company info structure: {company_info}")
+            logger.debug("📊 Company info structure: %s", company_info)
             company_found = bool(company_info)
             
             if not company_found:
@@ -228,7 +233,7 @@ class ContactFinder:
                 "api_key": self.hunter_api_key
             }
             
-            response = requests.get(search_url, params=params, timeout=15)
+            response = self.session.get(search_url, params=params, timeout=15)
             logger.info(f"📧 Hunter.io response status: {response.status_code}")
             
             if response.status_code != 200:
@@ -236,7 +241,7 @@ class ContactFinder:
                 return []
             
             data = response.json()
-            logger.info(f"📧 Hunter.io raw response: {data}")
+            logger.debug("📧 Hunter.io raw response: %s", data)
             emails = data.get("data", {}).get("emails", [])
             
             logger.info(f"📧 Found {len(emails)} personal emails from Hunter.io")
@@ -246,7 +251,7 @@ class ContactFinder:
             
             filtered_emails = []
             for i, email in enumerate(emails):
-                logger.info(f"📧 Processing email object {i}: {email}")
+                logger.debug("📧 Processing email object %s: %s", i, email)
                 # Hunter.io uses "value" field for the email address
                 email_data = email.get("value", "") or email.get("email", "") or email.get("address", "")
                 confidence = email.get("confidence", 0)
@@ -373,6 +378,14 @@ class ContactFinder:
         sample_email = f"{contact_title.lower().replace(' ', '.')}@{company.lower().replace(' ', '')}.com"
         return sample_email
         
+    def find_emails_bulk(self, company: str, contact_titles: List[str]) -> Dict[str, Optional[str]]:
+        """Find emails for several contacts at one company in a single lookup, keyed by title"""
+        logger.info(f"🔍 Finding emails for {len(contact_titles)} contacts at {company}")
+        
+        # Mock implementation - in real implementation this would be one Hunter.io domain search
+        domain = f"{company.lower().replace(' ', '')}.com"
+        return {title: f"{title.lower().replace(' ', '.')}@{domain}" for title in contact_titles}
+        
     def check_company_size_with_openai(self, company: str) -> Optional[int]:
         """Check company size using OpenAI's knowledge base first"""
         try:
@@ -550,7 +563,7 @@ Example format:
                 "X-RapidAPI-Host": "fresh-linkedin-scraper-api.p.rapidapi.com"
             }
             
-            profile_response = requests.get(
+            profile_response = self.session.get(
                 profile_url,
                 params={"company": linkedin_company_name},
                 headers=headers,
@@ -611,7 +624,7 @@ Example format:
             params = {"query": company_name}
             
             logger.info(f"🌐 Making domain finding call for {company_name}")
-            response = requests.get(url, params=params, timeout=30)  # Increased timeout to 30 seconds
+            response = self.session.get(url, params=params, timeout=30)  # Increased timeout to 30 seconds
             
             if response.status_code == 200:
                 data = response.json()
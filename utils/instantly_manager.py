@@ -168,7 +168,7 @@ class InstantlyManager:
             
             if response.status_code == 200:
                 data = response.json()
-                logger.info(f"📊 Raw response data: {data}")
+                logger.debug("📊 Raw response data: %s", data)
                 
                 # Extract leads from the response
                 if isinstance(data, dict) and 'items' in data:
@@ -1325,7 +1325,7 @@ Contact: {{contact_title}}
             return 0
 
     # Dashboard Methods
-    def get_all_campaigns(self) -> List[Dict[str, Any]]:
+    def get_all_campaigns(self, include_analytics: bool = True) -> List[Dict[str, Any]]:
         """Get all campaigns for dashboard display using the correct GET /api/v2/campaigns endpoint"""
         try:
             url = f"{self.base_url}/api/v2/campaigns"
@@ -1352,12 +1352,12 @@ Contact: {{contact_title}}
                     logger.error(f"Expected list of campaigns, got: {type(campaigns)}")
                     return []
                 
-                # Get analytics for each campaign
-                for campaign in campaigns:
-                    if isinstance(campaign, dict):
-                        campaign_id = campaign.get('id')
-                        if campaign_id:
-                            analytics = self.get_campaign_analytics(campaign_id)
+                # Merge in analytics for every campaign from one bulk request
+                if include_analytics:
+                    analytics_by_id = self.get_campaign_analytics_bulk()
+                    for campaign in campaigns:
+                        if isinstance(campaign, dict):
+                            analytics = analytics_by_id.get(campaign.get('id'))
                             if analytics:
                                 campaign.update(analytics)
                 
@@ -1403,6 +1403,44 @@ Contact: {{contact_title}}
             logger.error(f"Error getting campaign analytics {campaign_id}: {e}")
             return None
 
+    def get_campaign_analytics_bulk(self, campaign_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Get analytics for many campaigns from one GET /api/v2/campaigns/analytics call, keyed by campaign id"""
+        try:
+            url = f"{self.base_url}/api/v2/campaigns/analytics"
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            
+            # Without an id the endpoint returns analytics for every campaign
+            params = {
+                "exclude_total_leads_count": "false"
+            }
+            
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+            
+            if response.status_code != 200:
+                logger.error(f"Failed to get bulk campaign analytics: {response.status_code} - {response.text}")
+                return {}
+            
+            analytics_by_id = {
+                analytics.get("campaign_id"): analytics
+                for analytics in response.json() or []
+                if isinstance(analytics, dict) and analytics.get("campaign_id")
+            }
+            if campaign_ids is not None:
+                analytics_by_id = {
+                    campaign_id: analytics_by_id[campaign_id]
+                    for campaign_id in campaign_ids
+                    if campaign_id in analytics_by_id
+                }
+            logger.info(f"✅ Retrieved analytics for {len(analytics_by_id)} campaigns")
+            return analytics_by_id
+            
+        except Exception as e:
+            logger.error(f"Error getting bulk campaign analytics: {e}")
+            return {}
+
     def get_campaign_analytics_overview(self) -> Dict[str, Any]:
         """Get overview analytics for all campaigns"""
         try:
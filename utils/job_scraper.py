@@ -2,38 +2,65 @@ import os
 import logging
 import requests
 import json
+import copy
 import time
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# orjson setup (optional - JobSpy responses are decoded with the standard json module without it)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# OpenAI query parses kept per distinct query string, refreshed daily
+PARSED_QUERY_CACHE_SIZE = 4096
+PARSED_QUERY_CACHE_TTL = 24 * 3600
+
+# Major US cities searched city by city for nationwide queries
+US_CITIES: Tuple[str, ...] = (
+    "New York, NY", "Los Angeles, CA", "Chicago, IL", "Houston, TX", "Phoenix, AZ",
+    "Philadelphia, PA", "San Antonio, TX", "San Diego, CA", "Dallas, TX", "San Jose, CA",
+    "Austin, TX", "Jacksonville, FL", "Fort Worth, TX", "Columbus, OH", "Charlotte, NC",
+    "San Francisco, CA", "Indianapolis, IN", "Seattle, WA", "Denver, CO", "Washington, DC",
+    "Boston, MA", "El Paso, TX", "Nashville, TN", "Detroit, MI", "Oklahoma City, OK",
+    "Portland, OR", "Las Vegas, NV", "Memphis, TN", "Louisville, KY", "Baltimore, MD",
+    "Milwaukee, WI", "Albuquerque, NM", "Tucson, AZ", "Fresno, CA", "Sacramento, CA",
+    "Mesa, AZ", "Kansas City, MO", "Atlanta, GA", "Long Beach, CA", "Colorado Springs, CO",
+    "Raleigh, NC", "Miami, FL", "Virginia Beach, VA", "Omaha, NE", "Oakland, CA",
+    "Minneapolis, MN", "Tampa, FL", "Tulsa, OK", "Arlington, TX", "New Orleans, LA",
+    "Wichita, KS", "Cleveland, OH", "Bakersfield, CA", "Aurora, CO", "Anaheim, CA"
+)
+
 
 
 class JobScraper:
     def __init__(self):
         self.rapidapi_key = os.getenv("RAPIDAPI_KEY", "")
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
+        # Reused across calls (and the worker threads calling us) so TLS connections stay pooled
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
         # US cities for comprehensive search
-        self.us_cities = [
-            "New York, NY", "Los Angeles, CA", "Chicago, IL", "Houston, TX", "Phoenix, AZ",
-            "Philadelphia, PA", "San Antonio, TX", "San Diego, CA", "Dallas, TX", "San Jose, CA",
-            "Austin, TX", "Jacksonville, FL", "Fort Worth, TX", "Columbus, OH", "Charlotte, NC",
-            "San Francisco, CA", "Indianapolis, IN", "Seattle, WA", "Denver, CO", "Washington, DC",
-            "Boston, MA", "El Paso, TX", "Nashville, TN", "Detroit, MI", "Oklahoma City, OK",
-            "Portland, OR", "Las Vegas, NV", "Memphis, TN", "Louisville, KY", "Baltimore, MD",
-            "Milwaukee, WI", "Albuquerque, NM", "Tucson, AZ", "Fresno, CA", "Sacramento, CA",
-            "Mesa, AZ", "Kansas City, MO", "Atlanta, GA", "Long Beach, CA", "Colorado Springs, CO",
-            "Raleigh, NC", "Miami, FL", "Virginia Beach, VA", "Omaha, NE", "Oakland, CA",
-            "Minneapolis, MN", "Tampa, FL", "Tulsa, OK", "Arlington, TX", "New Orleans, LA",
-            "Wichita, KS", "Cleveland, OH", "Bakersfield, CA", "Aurora, CO", "Anaheim, CA"
-        ]
+        self.us_cities = US_CITIES
+        
+        # Parsed parameters per query string - parse_query makes an OpenAI call
+        self._parsed_queries = TTLCache(ttl=PARSED_QUERY_CACHE_TTL, maxsize=PARSED_QUERY_CACHE_SIZE)
         
     def parse_query(self, query: str) -> Dict[str, Any]:
         """
         Parse user query using OpenAI to extract JobSpy parameters
         """
+        cached = self._parsed_queries.get(query)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         logger.info(f"🔍 Parsing query: {query}")
         
         try:
@@ -108,6 +135,7 @@ class JobScraper:
                     parsed_params[key] = default_value
             
             logger.info(f"✅ Parsed query parameters: {parsed_params}")
+            self._parsed_queries.set(query, copy.deepcopy(parsed_params))
             return parsed_params
             
         except Exception as e:
@@ -246,11 +274,12 @@ class JobScraper:
                 
                 # Make direct JobSpy API call
                 logger.info(f"🌐 Making JobSpy API call for {search_term} in {location}")
-                response = requests.get(url, params=params, timeout=30)
+                response = self.session.get(url, params=params, timeout=30)
                 logger.info(f"🌐 JobSpy API response status: {response.status_code}")
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    # Large payloads (full descriptions) - decode from bytes with orjson when available
+                    data = orjson.loads(response.content) if orjson else response.json()
                     jobs = data.get('jobs', [])
                     total_jobs = data.get('total_jobs', 0)
                     logger.info(f"✅ Your JobSpy API returned {len(jobs)} jobs (total: {total_jobs}) for {location}")
@@ -299,14 +328,14 @@ class JobScraper:
             
             # Make direct domain finding call with longer timeout
             logger.info(f"🌐 Making domain finding call for {company_name}")
-            response = requests.get(url, params=params, timeout=30)  # Increased timeout to 30 seconds
+            response = self.session.get(url, params=params, timeout=30)  # Increased timeout to 30 seconds
             
             logger.info(f"🌐 Clearout API response status: {response.status_code}")
-            logger.info(f"🌐 Clearout API response text: {response.text}")
+            logger.debug("🌐 Clearout API response text: %s", response.text)
             
             if response.status_code == 200:
                 data = response.json()
-                logger.info(f"🌐 Clearout API parsed data: {data}")
+                logger.debug("🌐 Clearout API parsed data: %s", data)
                 
                 if data.get('status') == 'success' and data.get('data'):
                     # Get the best match with highest confidence
@@ -1,6 +1,7 @@
 import os
 import logging
 import json
+import hashlib
 from typing import Dict, Any, List
 from datetime import datetime
 
@@ -73,18 +74,18 @@ class MemoryManager:
         """Get memory statistics"""
         return self.data["stats"]
         
-    def create_job_fingerprint(self, job: Dict[str, Any]) -> str:
+    def create_job_fingerprint(self, job: Dict[str, Any]) -> int:
         """Create a unique fingerprint for a job"""
-        # Create a unique identifier based on job title, company, and URL
-        job_id = f"{job.get('title', '')}-{job.get('company', '')}-{job.get('job_url', '')}"
-        return job_id
+        # Stable 64-bit digest of job title, company, and URL - the same across workers and restarts
+        job_id = f"{job.get('title', '')}|{job.get('company', '')}|{job.get('job_url', '')}"
+        return int.from_bytes(hashlib.blake2b(job_id.encode(), digest_size=8).digest(), "big")
         
-    def is_job_processed(self, job_fingerprint: str) -> bool:
+    def is_job_processed(self, job_fingerprint: int) -> bool:
         """Check if a job has already been processed"""
         # Mock implementation - in real implementation this would check memory
         return False
         
-    def mark_job_processed(self, job_fingerprint: str):
+    def mark_job_processed(self, job_fingerprint: int):
         """Mark a job as processed"""
         # Mock implementation - in real implementation this would store in memory
         logger.info(f"✅ Marked job {job_fingerprint} as processed")
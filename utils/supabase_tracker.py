@@ -20,11 +20,50 @@ if SUPABASE_URL and SUPABASE_ANON_KEY:
 else:
     supabase = None
 
+# Rows per bulk insert when flushing staged tracking rows
+FLUSH_BATCH_SIZE = 1000
+
 class CompanyProcessingTracker:
     """Track each step of company processing in Supabase"""
     
     def __init__(self, batch_id: str):
         self.batch_id = batch_id
+        # company -> [(table, row)] staged until flush_all()
+        self._rows: Dict[str, List[tuple]] = {}
+        self.pending_rows = 0
+    
+    def stage(self, company: str, table: str, data: Dict[str, Any]):
+        """Stage a row for a company; it is written by the next flush_all()"""
+        self._rows.setdefault(company, []).append((table, data))
+        self.pending_rows += 1
+    
+    def take_staged(self) -> Dict[str, List[tuple]]:
+        """Detach the staged rows so they can be written elsewhere while staging continues"""
+        staged, self._rows = self._rows, {}
+        self.pending_rows = 0
+        return staged
+    
+    def flush_all(self):
+        """Write every staged row, one bulk insert per table (per FLUSH_BATCH_SIZE rows)"""
+        self.write_staged(self.take_staged())
+    
+    def write_staged(self, staged: Dict[str, List[tuple]]):
+        """Bulk insert rows returned by take_staged()"""
+        if not supabase or not staged:
+            return
+        
+        by_table: Dict[str, List[Dict[str, Any]]] = {}
+        for rows in staged.values():
+            for table, data in rows:
+                by_table.setdefault(table, []).append(data)
+        
+        for table, rows in by_table.items():
+            for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                chunk = rows[start:start + FLUSH_BATCH_SIZE]
+                try:
+                    supabase.table(table).insert(chunk, returning="minimal").execute()
+                except Exception as e:
+                    print(f"Error saving {len(chunk)} rows to {table}: {e}")
     
     def save_domain_search(self, company: str, domain: Optional[str] = None, error: Optional[str] = None):
         """Save domain search results"""
@@ -40,7 +79,7 @@ class CompanyProcessingTracker:
                 "search_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("domain_search_results").insert(data).execute()
+            self.stage(company, "domain_search_results", data)
         except Exception as e:
             print(f"Error saving domain search: {e}")
     
@@ -58,7 +97,7 @@ class CompanyProcessingTracker:
                 "resolution_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("linkedin_resolution").insert(data).execute()
+            self.stage(company, "linkedin_resolution", data)
         except Exception as e:
             print(f"Error saving LinkedIn resolution: {e}")
     
@@ -81,7 +120,7 @@ class CompanyProcessingTracker:
                 "analysis_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("rapidapi_analysis").insert(data).execute()
+            self.stage(company, "rapidapi_analysis", data)
         except Exception as e:
             print(f"Error saving RapidAPI analysis: {e}")
     
@@ -98,7 +137,7 @@ class CompanyProcessingTracker:
                 # Try to get domain from email address
                 first_email = emails[0].get("email", "")
                 if "@" in first_email:
-                    domain = first_email.split("@")[1]
+                    domain = first_email.rpartition("@")[2]
                 # Or use company website if available
                 elif emails[0].get("company"):
                     domain = emails[0].get("company")
@@ -115,7 +154,7 @@ class CompanyProcessingTracker:
                 "search_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("hunter_emails").insert(data).execute()
+            self.stage(company, "hunter_emails", data)
         except Exception as e:
             print(f"Error saving Hunter emails: {e}")
     
@@ -137,7 +176,7 @@ class CompanyProcessingTracker:
                 "campaign_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("instantly_campaigns").insert(data).execute()
+            self.stage(company, "instantly_campaigns", data)
         except Exception as e:
             print(f"Error saving Instantly campaign: {e}")
     
@@ -165,7 +204,7 @@ class CompanyProcessingTracker:
                 "processing_error": error,
                 "timestamp": datetime.now().isoformat()
             }
-            supabase.table("company_processing_summary").insert(data).execute()
+            self.stage(company, "company_processing_summary", data)
         except Exception as e:
             print(f"Error saving company summary: {e}")
     
@@ -0,0 +1,38 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class TTLCache:
+    """LRU-bounded in-process cache whose entries expire after a TTL; safe to share across worker threads"""
+    
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Return the cached value, or default if it's missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Cache a value for ttl seconds (defaults to the cache's TTL), evicting the least recently used"""
+        with self.lock:
+            self.entries[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self.lock:
+            self.entries.clear()